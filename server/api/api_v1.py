@@ -4,10 +4,12 @@ from api.tag.router import router as tag_router
 from api.article.router import router as article_router
 from api.vote.router import router as vote_router
 from api.comment.router import router as comment_router
+from api.internal.router import router as internal_router
 
 api_router = APIRouter()
 api_router.include_router(user_router, tags=['user'])
 api_router.include_router(tag_router, tags=['tag'], prefix='/tag')
 api_router.include_router(article_router, tags=['article'], prefix='/article')
 api_router.include_router(vote_router, tags=['vote'], prefix='/vote')
-api_router.include_router(comment_router, tags=['comment'], prefix='/comment')
\ No newline at end of file
+api_router.include_router(comment_router, tags=['comment'], prefix='/comment')
+api_router.include_router(internal_router, tags=['internal'], prefix='/internal')
\ No newline at end of file
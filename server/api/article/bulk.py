@@ -0,0 +1,136 @@
+from datetime import datetime
+from secrets import token_hex
+from typing import AsyncIterable, AsyncIterator
+from pydantic import ValidationError
+from sqlalchemy import select, insert
+from sqlalchemy.orm import selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
+from api.tag.model import Tag
+from api.article.model import Article, ArticleRender, association_table
+from api.article.render import render_row
+from api.article.schemas import ArticleImportSchema, ArticleImportReport, ArticleImportFailure
+from utils.pagination import Page, paginate, encode_cursor
+
+NDJSON_MEDIA_TYPE = 'application/x-ndjson'
+MAX_REPORTED_ERRORS = 100
+
+
+def new_article_id(title: str) -> str:
+    return f"{title.lower().strip().replace(' ', '-')}-{token_hex(5)}"
+
+
+async def ndjson_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[bytes]:
+    buffer = b''
+
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b'\n')
+
+        for line in lines:
+            yield line
+
+    yield buffer
+
+
+def record_failure(report: ArticleImportReport, line: int, detail: str):
+    report.failed += 1
+
+    if len(report.errors) < MAX_REPORTED_ERRORS:
+        report.errors.append(ArticleImportFailure(line=line, detail=detail))
+
+
+async def insert_batch(db: AsyncSession, batch: list, report: ArticleImportReport):
+    existing = set((await db.scalars(
+        select(Article.id).where(Article.id.in_([article.id for _, article in batch])))).all())
+    now = datetime.now()
+    articles, renders, links = [], [], []
+
+    for line, article in batch:
+        if article.id in existing:
+            record_failure(report, line, f'Article {article.id} already exists')
+            continue
+
+        existing.add(article.id)
+        articles.append({
+            **article.model_dump(exclude={'tags'}),
+            'created_at': article.created_at or now,
+        })
+        renders.append(render_row(article.id, article.content, article.updated_at or article.created_at or now))
+        links.extend({'article_id': article.id, 'tag_id': tag_id} for tag_id in dict.fromkeys(article.tags))
+
+    if articles:
+        await db.execute(insert(Article), articles)
+        await db.execute(insert(ArticleRender), renders)
+
+        if links:
+            await db.execute(insert(association_table), links)
+
+        await db.commit()
+
+    report.imported += len(articles)
+
+
+async def import_articles(db: AsyncSession, lines: AsyncIterable[bytes | str], batch_size: int) -> ArticleImportReport:
+    tags = set((await db.scalars(select(Tag.id))).all())
+    report = ArticleImportReport()
+    batch = []
+    line = 0
+
+    async for raw in lines:
+        line += 1
+
+        if not raw.strip():
+            continue
+
+        try:
+            article = ArticleImportSchema.model_validate_json(raw)
+
+        except ValidationError as error:
+            record_failure(report, line, '; '.join(
+                f"{'.'.join(map(str, e['loc'])) or 'line'}: {e['msg']}" for e in error.errors()))
+            continue
+
+        unknown = set(article.tags) - tags
+
+        if unknown:
+            record_failure(report, line, f"Unknown tags: {', '.join(sorted(unknown))}")
+            continue
+
+        article.id = article.id or new_article_id(article.title)
+        batch.append((line, article))
+
+        if len(batch) >= batch_size:
+            await insert_batch(db, batch, report)
+            batch = []
+
+    if batch:
+        await insert_batch(db, batch, report)
+
+    return report
+
+
+async def export_articles(db: AsyncSession, batch_size: int) -> AsyncIterator[bytes]:
+    columns = [Article.created_at, Article.id]
+    stmt = select(Article).options(selectinload(Article.tags))
+    page = Page(None, batch_size)
+
+    while True:
+        articles = (await db.scalars(paginate(stmt, columns, page))).all()
+
+        for article in articles[:batch_size]:
+            yield ArticleImportSchema(
+                id=article.id,
+                title=article.title,
+                article_img_url=article.article_img_url,
+                description=article.description,
+                content=article.content,
+                tags=[tag.id for tag in article.tags],
+                created_at=article.created_at,
+                updated_at=article.updated_at,
+            ).model_dump_json().encode() + b'\n'
+
+        if len(articles) <= batch_size:
+            break
+
+        page.cursor = encode_cursor([getattr(articles[batch_size - 1], column.key) for column in columns])
+        db.expunge_all()
@@ -0,0 +1,75 @@
+from sqlalchemy import select, update, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from api.article.model import Article
+from api.comment.model import Comment
+from api.vote.model import Vote
+
+
+# counters are bookkeeping, not edits: every update pins updated_at to itself so its onupdate doesn't fire
+async def adjust_vote_count(db: AsyncSession, article_id: str, delta: int):
+    await db.execute(
+        update(Article)
+        .where(Article.id == article_id)
+        .values(vote_count=Article.vote_count + delta, updated_at=Article.updated_at)
+    )
+
+
+async def adjust_comment_count(db: AsyncSession, article_id: str, delta: int):
+    await db.execute(
+        update(Article)
+        .where(Article.id == article_id)
+        .values(comment_count=Article.comment_count + delta, updated_at=Article.updated_at)
+    )
+
+
+# votes and comments disappear with their user through the ORM cascade, so take them off the counters first
+async def release_user_counters(db: AsyncSession, user_id: str):
+    await db.execute(
+        update(Article)
+        .where(Article.id.in_(select(Vote.article_id).where(Vote.user_id == user_id)))
+        .values(vote_count=Article.vote_count - 1, updated_at=Article.updated_at)
+    )
+
+    user_comments = select(func.count()).where(Comment.article_id == Article.id, Comment.user_id == user_id)
+    await db.execute(
+        update(Article)
+        .where(Article.id.in_(select(Comment.article_id).where(Comment.user_id == user_id)))
+        .values(comment_count=Article.comment_count - user_comments.scalar_subquery(), updated_at=Article.updated_at)
+    )
+
+
+async def recount_votes(db: AsyncSession, article_ids: list):
+    await db.execute(
+        update(Article)
+        .where(Article.id.in_(article_ids))
+        .values(
+            vote_count=select(func.count()).where(Vote.article_id == Article.id).scalar_subquery(),
+            updated_at=Article.updated_at,
+        )
+    )
+
+
+async def reconcile_counters(db: AsyncSession, batch_size: int = 1000) -> int:
+    votes = select(func.count()).where(Vote.article_id == Article.id).scalar_subquery()
+    comments = select(func.count()).where(Comment.article_id == Article.id).scalar_subquery()
+    last_id, checked = None, 0
+
+    while True:
+        stmt = select(Article.id).order_by(Article.id).limit(batch_size)
+
+        if last_id is not None:
+            stmt = stmt.where(Article.id > last_id)
+
+        ids = (await db.scalars(stmt)).all()
+
+        if not ids:
+            return checked
+
+        await db.execute(
+            update(Article)
+            .where(Article.id.in_(ids), (Article.vote_count != votes) | (Article.comment_count != comments))
+            .values(vote_count=votes, comment_count=comments, updated_at=Article.updated_at)
+        )
+        await db.commit()
+
+        last_id, checked = ids[-1], checked + len(ids)
@@ -0,0 +1,20 @@
+from sqlalchemy.orm import selectinload, defer, noload
+from api.article.model import Article, ArticleRender
+from api.comment.model import Comment
+
+
+def article_loader_options(include_comments: bool = True, include_render: bool = False):
+    return [
+        selectinload(Article.tags),
+        selectinload(Article.render) if include_render else noload(Article.render),
+        selectinload(Article.votes),
+        selectinload(Article.comments).joinedload(Comment.user) if include_comments else noload(Article.comments),
+    ]
+
+
+def article_summary_loader_options():
+    return [
+        defer(Article.content),
+        selectinload(Article.tags),
+        selectinload(Article.render).load_only(ArticleRender.excerpt, ArticleRender.reading_time),
+    ]
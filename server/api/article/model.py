@@ -1,4 +1,5 @@
-from sqlalchemy import Column, String, Integer, TIMESTAMP, TEXT, ForeignKey, func, Table
+from sqlalchemy import Column, String, Integer, TIMESTAMP, TEXT, JSON, ForeignKey, func, Table, Index
+from sqlalchemy.dialects.mysql import MEDIUMTEXT
 from sqlalchemy.orm import relationship
 from db.base import Base
 
@@ -13,6 +14,11 @@ association_table = Table(
 
 class Article(Base):
     __tablename__ = 'articles'
+    __table_args__ = (
+        Index('ix_articles_created_at_id', 'created_at', 'id'),
+        Index('ix_articles_fulltext', 'title', 'description', 'content', mysql_prefix='FULLTEXT'),
+        Index('ix_articles_vote_count_created_at_id', 'vote_count', 'created_at', 'id'),
+    )
 
     id = Column(String(255), primary_key=True)
     title = Column(String(255), index=True, nullable=False)
@@ -21,10 +27,28 @@ class Article(Base):
     content = Column(TEXT, nullable=False)
     created_at = Column(TIMESTAMP, server_default=func.now(), nullable=False)
     updated_at = Column(TIMESTAMP, onupdate=func.now())
+    vote_count = Column(Integer, nullable=False, default=0, server_default='0')
+    comment_count = Column(Integer, nullable=False, default=0, server_default='0')
 
     tags = relationship('Tag', secondary=association_table, backref='article')
     comments = relationship('Comment', backref='article', cascade='all, delete-orphan')
     votes = relationship('Vote', backref='article', cascade="all, delete-orphan")
+    render = relationship('ArticleRender', uselist=False, cascade='all, delete-orphan')
 
     def __repr__(self) -> str:
         return f"<Article title={self.title} />"
+
+
+# derived from content; source_updated_at records which version of the article it was rendered from
+class ArticleRender(Base):
+    __tablename__ = 'article_renders'
+
+    article_id = Column(String(255), ForeignKey('articles.id', ondelete='CASCADE'), primary_key=True)
+    source_updated_at = Column(TIMESTAMP, nullable=False)
+    html = Column(TEXT().with_variant(MEDIUMTEXT(), 'mysql'), nullable=False)
+    reading_time = Column(Integer, nullable=False)
+    excerpt = Column(String(1000), nullable=False)
+    toc = Column(JSON, nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<ArticleRender article_id={self.article_id} />"
@@ -0,0 +1,199 @@
+import re
+from html import escape
+from html.parser import HTMLParser
+from math import ceil
+from sqlalchemy import select, insert, delete, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from api.article.model import Article, ArticleRender
+
+ALLOWED_TAGS = {
+    'p', 'br', 'hr', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'strong', 'b', 'em', 'i', 'u', 's', 'sub', 'sup',
+    'span', 'blockquote', 'pre', 'code', 'ul', 'ol', 'li', 'a', 'img', 'figure', 'figcaption',
+    'table', 'thead', 'tbody', 'tr', 'th', 'td',
+}
+VOID_TAGS = {'br', 'hr', 'img'}
+INLINE_TAGS = {'strong', 'b', 'em', 'i', 'u', 's', 'sub', 'sup', 'span', 'code', 'a'}
+DROPPED_TAGS = {'script', 'style', 'iframe', 'object', 'embed', 'template', 'noscript'}
+ALLOWED_ATTRIBUTES = {
+    '*': {'class'},
+    'a': {'href', 'title', 'target', 'rel'},
+    'img': {'src', 'alt', 'title', 'width', 'height'},
+}
+SAFE_SCHEMES = {'http', 'https', 'mailto'}
+TOC_TAGS = {'h1', 'h2', 'h3'}
+WORDS_PER_MINUTE = 200
+EXCERPT_LENGTH = 280
+
+
+def safe_url(tag: str, value: str) -> bool:
+    scheme = value.strip().split(':', 1)[0].lower() if re.match(r'^\s*[a-zA-Z][\w+.-]*:', value) else ''
+
+    # quill embeds pasted images as data uris
+    return scheme in SAFE_SCHEMES or scheme == '' or (tag == 'img' and value.strip().startswith('data:image/'))
+
+
+def slugify(text: str) -> str:
+    return re.sub(r'[^\w]+', '-', text.lower()).strip('-') or 'section'
+
+
+class ArticleRenderer(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.out, self.text, self.toc, self.open = [], [], [], []
+        self.skipping = 0
+        self.heading = None
+        self.slugs = set()
+
+    def attributes(self, tag: str, attrs: list) -> str:
+        allowed = ALLOWED_ATTRIBUTES['*'] | ALLOWED_ATTRIBUTES.get(tag, set())
+
+        return ''.join(
+            f' {name}="{escape(value or "", quote=True)}"' for name, value in attrs
+            if name in allowed and (name not in ('href', 'src') or safe_url(tag, value or ''))
+        )
+
+    def handle_starttag(self, tag, attrs):
+        if tag in DROPPED_TAGS or self.skipping:
+            self.skipping += tag in DROPPED_TAGS
+            return
+
+        if tag not in INLINE_TAGS:
+            self.text.append(' ')
+
+        if tag not in ALLOWED_TAGS:
+            return
+
+        if tag in TOC_TAGS and self.heading is None:
+            self.heading = (tag, len(self.out), self.attributes(tag, attrs), [])
+
+        self.out.append(f'<{tag}{self.attributes(tag, attrs)}>')
+
+        if tag not in VOID_TAGS:
+            self.open.append(tag)
+
+    def handle_endtag(self, tag):
+        if self.skipping:
+            self.skipping -= tag in DROPPED_TAGS
+            return
+
+        if tag not in INLINE_TAGS:
+            self.text.append(' ')
+
+        if tag not in self.open:
+            return
+
+        while self.open:
+            current = self.open.pop()
+            self.out.append(f'</{current}>')
+
+            if self.heading and current == self.heading[0]:
+                self.close_heading()
+
+            if current == tag:
+                break
+
+    def close_heading(self):
+        tag, index, attributes, text = self.heading
+        title = ' '.join(''.join(text).split())
+        slug, n = slugify(title), 1
+
+        while slug in self.slugs:
+            n += 1
+            slug = f'{slugify(title)}-{n}'
+
+        self.slugs.add(slug)
+        self.out[index] = f'<{tag} id="{slug}"{attributes}>'
+        self.toc.append({"level": int(tag[1]), "id": slug, "title": title})
+        self.heading = None
+
+    def handle_data(self, data):
+        if self.skipping:
+            return
+
+        self.out.append(escape(data, quote=False))
+        self.text.append(data)
+
+        if self.heading:
+            self.heading[3].append(data)
+
+    def close(self):
+        super().close()
+
+        while self.open:
+            self.handle_endtag(self.open[-1])
+
+
+def render_content(content: str) -> dict:
+    renderer = ArticleRenderer()
+    renderer.feed(content)
+    renderer.close()
+
+    words = ''.join(renderer.text).split()
+    text = ' '.join(words)
+    excerpt = text if len(text) <= EXCERPT_LENGTH else text[:EXCERPT_LENGTH].rsplit(' ', 1)[0] + '…'
+
+    return {
+        "html": ''.join(renderer.out),
+        "reading_time": max(1, ceil(len(words) / WORDS_PER_MINUTE)),
+        "excerpt": excerpt,
+        "toc": renderer.toc,
+    }
+
+
+def render_row(article_id: str, content: str, source_updated_at) -> dict:
+    return {"article_id": article_id, "source_updated_at": source_updated_at, **render_content(content)}
+
+
+def render_version(article: Article):
+    return article.updated_at or article.created_at
+
+
+# expects article.render to be loaded
+def render_is_current(article: Article) -> bool:
+    return article.render is not None and article.render.source_updated_at == render_version(article)
+
+
+async def save_render(db: AsyncSession, article: Article):
+    # flush first so the server-side timestamps the render is keyed on are known
+    await db.flush()
+    await db.refresh(article, attribute_names=['created_at', 'updated_at', 'render'])
+
+    if render_is_current(article):
+        return
+
+    render = article.render or ArticleRender(article_id=article.id)
+
+    for key, value in render_content(article.content).items():
+        setattr(render, key, value)
+
+    render.source_updated_at = render_version(article)
+    article.render = render
+
+
+async def render_stale_articles(db: AsyncSession, batch_size: int = 1000) -> int:
+    version = func.coalesce(Article.updated_at, Article.created_at)
+    last_id, rendered = None, 0
+
+    while True:
+        stmt = (
+            select(Article.id, Article.content, version)
+            .outerjoin(ArticleRender)
+            .where(ArticleRender.article_id.is_(None) | (ArticleRender.source_updated_at != version))
+            .order_by(Article.id)
+            .limit(batch_size)
+        )
+
+        if last_id is not None:
+            stmt = stmt.where(Article.id > last_id)
+
+        rows = (await db.execute(stmt)).all()
+
+        if not rows:
+            return rendered
+
+        await db.execute(delete(ArticleRender).where(ArticleRender.article_id.in_([row[0] for row in rows])))
+        await db.execute(insert(ArticleRender), [
+            render_row(article_id, content, source_updated_at) for article_id, content, source_updated_at in rows])
+        await db.commit()
+
+        last_id, rendered = rows[-1][0], rendered + len(rows)
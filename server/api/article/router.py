@@ -1,78 +1,127 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from api.tag.model import Tag
-from api.comment.model import Comment
-from api.vote.model import Vote
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import insert, delete
+from api.tag.cache import tag_index
 from api.article.model import Article, association_table
-from api.article.schemas import ArticleSchema, ArticleUpdateSchema, ArticleResponse
+from api.article.schemas import (ArticleSchema, ArticleUpdateSchema, ArticleResponse, ArticleRenderedResponse,
+                                 ArticleRenderResponse, ArticleImportReport)
+from api.article.render import render_content, render_is_current, save_render
+from api.article.loaders import article_loader_options
+from api.article.bulk import import_articles, export_articles, ndjson_lines, new_article_id, NDJSON_MEDIA_TYPE
+from db.base import DB_LOCAL
+from utils.config import settings
 from utils.session import get_db
+from utils.cache import invalidate_responses, ARTICLE_LISTINGS, ARTICLE_DETAILS, COMMENT_THREADS
 from api.user.oauth2 import get_user
 from api.user.config import check_admin_permission
-from secrets import token_hex
 
 router = APIRouter()
 
 
 @router.post('/create', status_code=201, response_model=ArticleResponse)
-async def create_article(schema: ArticleSchema, db: Session = Depends(get_db), user = Depends(get_user)):
+async def create_article(schema: ArticleSchema, db: AsyncSession = Depends(get_db), user = Depends(get_user)):
     check_admin_permission(user)
 
+    tag_ids = await tag_index.resolve(db, schema.tags)
+
     article = Article(**schema.model_dump(exclude={'tags'}))
-    article.id = f"{article.title.lower().strip().replace(' ', '-')}-{token_hex(5)}"
-    article.tags = db.query(Tag).filter(Tag.id.in_(schema.tags)).all()
-    article.comments = db.query(Comment).filter(Comment.article_id == article.id).all()
-    article.votes = db.query(Vote).filter(Vote.article_id == article.id).all()
+    article.id = new_article_id(article.title)
 
     db.add(article)
-    db.commit()
+    await save_render(db, article)
+
+    if tag_ids:
+        await db.execute(
+            insert(association_table), [{"article_id": article.id, "tag_id": tag_id} for tag_id in tag_ids])
+
+    await db.commit()
+    await invalidate_responses(*ARTICLE_LISTINGS)
 
-    return article
+    return await db.get(Article, article.id, options=article_loader_options(), populate_existing=True)
+
+
+@router.post('/import', status_code=200, response_model=ArticleImportReport)
+async def import_articles_ndjson(request: Request, db: AsyncSession = Depends(get_db), user = Depends(get_user)):
+    check_admin_permission(user)
 
+    report = await import_articles(db, ndjson_lines(request.stream()), settings.BULK_BATCH_SIZE)
+
+    if report.imported:
+        await invalidate_responses(*ARTICLE_LISTINGS)
+
+    return report
+
+
+@router.get('/export', status_code=200)
+async def export_articles_ndjson(user = Depends(get_user)):
+    check_admin_permission(user)
 
-@router.get('/{article_id}', status_code=200, response_model=ArticleResponse)
-async def get_article(article_id: str, db: Session = Depends(get_db)):
-    article = db.query(Article).get(article_id)
+    async def stream():
+        async with DB_LOCAL() as db:
+            async for line in export_articles(db, settings.BULK_BATCH_SIZE):
+                yield line
+
+    return StreamingResponse(stream(), media_type=NDJSON_MEDIA_TYPE)
+
+
+@router.get('/{article_id}', status_code=200, response_model=ArticleResponse | ArticleRenderedResponse)
+async def get_article(
+    article_id: str, include_comments: bool = True, render: bool = False, db: AsyncSession = Depends(get_db)):
+    article = await db.get(Article, article_id, options=article_loader_options(include_comments, render))
 
     if not article:
         raise HTTPException(404, detail='Article not found')
-    
-    return article
+
+    if not render:
+        return article
+
+    response = ArticleRenderedResponse.model_validate(article)
+
+    # rows written before renders existed are rendered per request until manage.py render-articles catches up
+    if not render_is_current(article):
+        response.render = ArticleRenderResponse(**render_content(article.content))
+
+    return response
 
 
 @router.put('/{article_id}/update', status_code=200, response_model=ArticleResponse)
 async def updated_article(
-    article_id: str, schema: ArticleUpdateSchema, db: Session = Depends(get_db), user = Depends(get_user)):
+    article_id: str, schema: ArticleUpdateSchema, db: AsyncSession = Depends(get_db), user = Depends(get_user)):
     check_admin_permission(user)
 
-    article = db.query(Article).get(article_id)
+    article = await db.get(Article, article_id)
 
     if not article:
         raise HTTPException(404, detail='Article not found')
-    
+
+    tag_ids = await tag_index.resolve(db, schema.tags) if schema.tags else None
     form = schema.model_dump(exclude={'tags'}, exclude_unset=True)
 
     for key, value in form.items():
         setattr(article, key, value)
 
-    if schema.tags:
-        article.tags = db.query(Tag).filter(Tag.id.in_(schema.tags)).all()
+    if tag_ids:
+        await db.execute(delete(association_table).where(association_table.c.article_id == article_id))
+        await db.execute(
+            insert(association_table), [{"article_id": article_id, "tag_id": tag_id} for tag_id in tag_ids])
 
-    db.commit()
-    db.refresh(article)
+    await save_render(db, article)
+    await db.commit()
+    await invalidate_responses(*ARTICLE_LISTINGS, ARTICLE_DETAILS + article_id)
 
-    return article
+    return await db.get(Article, article_id, options=article_loader_options(), populate_existing=True)
 
 
 @router.delete('/{article_id}/delete', status_code=204)
-async def delete_article(article_id: str, db: Session = Depends(get_db), user = Depends(get_user)):
+async def delete_article(article_id: str, db: AsyncSession = Depends(get_db), user = Depends(get_user)):
     check_admin_permission(user)
 
-    article = db.query(Article).get(article_id)
-    associations = db.query(association_table).filter_by(article_id=article_id).all()
+    article = await db.get(Article, article_id)
 
     if not article:
         raise HTTPException(404, detail='Article not found')
     
-    db.delete(associations)
-    db.delete(article)
-    db.commit()
\ No newline at end of file
+    await db.delete(article)
+    await db.commit()
+    await invalidate_responses(*ARTICLE_LISTINGS, ARTICLE_DETAILS + article_id, COMMENT_THREADS + article_id)
@@ -1,10 +1,13 @@
 from pydantic import BaseModel
-from typing import List
+from typing import List, Literal
 from datetime import datetime
 from api.tag.schemas import TagResponse
 from api.comment.schemas import CommentResponse
 from api.vote.schemas import VoteResponse
 
+ArticleView = Literal['full', 'summary']
+ArticleSort = Literal['latest', 'top']
+
 
 class ArticleSchema(BaseModel):
     title: str
@@ -14,6 +17,23 @@ class ArticleSchema(BaseModel):
     tags: List[str]
 
 
+class ArticleImportSchema(ArticleSchema):
+    id: str = None
+    created_at: datetime = None
+    updated_at: datetime | None = None
+
+
+class ArticleImportFailure(BaseModel):
+    line: int
+    detail: str
+
+
+class ArticleImportReport(BaseModel):
+    imported: int = 0
+    failed: int = 0
+    errors: List[ArticleImportFailure] = []
+
+
 class ArticleUpdateSchema(BaseModel):
     title: str = None
     article_img_url: str = None
@@ -33,6 +53,66 @@ class ArticleResponse(BaseModel):
     tags: List[TagResponse]
     votes: List[VoteResponse]
     comments: List[CommentResponse]
+    vote_count: int
+    comment_count: int
+
+    class Config:
+        from_attributes = True
+
+
+class TocEntry(BaseModel):
+    level: int
+    id: str
+    title: str
+
+
+class ArticleRenderResponse(BaseModel):
+    html: str
+    reading_time: int
+    excerpt: str
+    toc: List[TocEntry]
+
+    class Config:
+        from_attributes = True
+
+
+class ArticleExcerptResponse(BaseModel):
+    reading_time: int
+    excerpt: str
+
+    class Config:
+        from_attributes = True
+
+
+class ArticleRenderedResponse(BaseModel):
+    id: str
+    title: str
+    article_img_url: str
+    description: str
+    render: ArticleRenderResponse | None
+    created_at: datetime
+    updated_at: datetime | None
+    tags: List[TagResponse]
+    votes: List[VoteResponse]
+    comments: List[CommentResponse]
+    vote_count: int
+    comment_count: int
+
+    class Config:
+        from_attributes = True
+
+
+class ArticleSummaryResponse(BaseModel):
+    id: str
+    title: str
+    article_img_url: str
+    description: str
+    created_at: datetime
+    updated_at: datetime | None
+    tags: List[TagResponse]
+    render: ArticleExcerptResponse | None
+    vote_count: int
+    comment_count: int
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
@@ -0,0 +1,19 @@
+import re
+from sqlalchemy.dialects.mysql import match
+from api.article.model import Article
+
+
+def search_terms(query: str):
+    return re.findall(r'\w+', query or '')
+
+
+def search_relevance(query: str):
+    terms = search_terms(query)
+
+    if not terms:
+        return None
+
+    return match(
+        Article.title, Article.description, Article.content,
+        against=' '.join(f'{term}*' for term in terms)
+    ).in_boolean_mode()
@@ -0,0 +1,11 @@
+from sqlalchemy.orm import joinedload, selectinload
+from api.comment.model import Comment
+
+
+def comment_loader_options():
+    return [joinedload(Comment.user)]
+
+
+# a page of comments shares few distinct authors, so load them in one IN query instead of joining per row
+def comment_thread_loader_options():
+    return [selectinload(Comment.user)]
@@ -1,9 +1,10 @@
-from sqlalchemy import Column, String, Integer, ForeignKey, func, TIMESTAMP
+from sqlalchemy import Column, String, Integer, ForeignKey, func, TIMESTAMP, Index
 from db.base import Base
 
 
 class Comment(Base):
     __tablename__ = 'comments'
+    __table_args__ = (Index('ix_comments_article_id_created_at', 'article_id', 'created_at'),)
 
     id = Column(Integer, primary_key=True)
     user_id = Column(String(255), ForeignKey('users.id'), nullable=False)
@@ -1,52 +1,86 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
 from utils.session import get_db
+from typing import List
+from utils.cache import invalidate_responses, ARTICLE_LISTINGS, ARTICLE_DETAILS, COMMENT_THREADS
+from utils.pagination import Page, paginate, page_results
 from api.user.oauth2 import get_user
 from api.comment.model import Comment
 from api.comment.schemas import CommentSchema, CommentResponse
+from api.comment.loaders import comment_loader_options, comment_thread_loader_options
 from api.article.model import Article
+from api.article.counters import adjust_comment_count
+from api.write_behind import write_behind
 
 router = APIRouter()
 
 
+@router.get('/{article_id}', status_code=200, response_model=List[CommentResponse])
+async def get_comments(article_id: str, response: Response, page: Page = Depends(), db: AsyncSession = Depends(get_db)):
+    columns = [Comment.created_at, Comment.id]
+    stmt = select(Comment).options(*comment_thread_loader_options()).where(Comment.article_id == article_id)
+    comments = (await db.scalars(paginate(stmt, columns, page))).all()
+
+    if not comments and not page.cursor and not await db.get(Article, article_id):
+        raise HTTPException(404, detail='Article not found')
+
+    return page_results(comments, columns, page, response)
+
+
 @router.post('/{article_id}/create', status_code=201, response_model=CommentResponse)
 async def create_comment(
-    article_id: str, schema: CommentSchema, db: Session = Depends(get_db), user = Depends(get_user)):
+    article_id: str, schema: CommentSchema, db: AsyncSession = Depends(get_db), user = Depends(get_user)):
     
-    if not db.query(Article).get(article_id):
+    if not await db.get(Article, article_id):
         raise HTTPException(404, detail='Article not found')
     
     comment = Comment(user_id=user.id, article_id=article_id, comment=schema.comment)
 
-    db.add(comment)
-    db.commit()
+    if write_behind.accepting():
+        # hand the connection back to the pool while the comment waits for its batch
+        await db.rollback()
+        await write_behind.add_comment(comment)
 
-    return comment
+    else:
+        db.add(comment)
+        await adjust_comment_count(db, article_id, 1)
+        await db.commit()
+
+    await invalidate_responses(*ARTICLE_LISTINGS, ARTICLE_DETAILS + article_id, COMMENT_THREADS + article_id)
+
+    return await db.get(Comment, comment.id, options=comment_loader_options(), populate_existing=True)
 
 
 @router.patch('/{comment_id}/update', status_code=200, response_model=CommentResponse)
 async def update_comment(
-    comment_id: int, schema: CommentSchema, db: Session = Depends(get_db), user = Depends(get_user)):
-    comment = db.query(Comment).filter_by(id=comment_id, user_id=user.id).first()
+    comment_id: int, schema: CommentSchema, db: AsyncSession = Depends(get_db), user = Depends(get_user)):
+    comment = await db.scalar(
+        select(Comment).options(*comment_loader_options()).filter_by(id=comment_id, user_id=user.id))
 
     if not comment:
         raise HTTPException(403, detail='Operation cannot be completed')
     
     comment.comment = schema.comment
 
-    db.commit()
-    db.refresh(comment)
+    await db.commit()
+    await db.refresh(comment, attribute_names=['updated_at'])
+    await invalidate_responses(
+        *ARTICLE_LISTINGS, ARTICLE_DETAILS + comment.article_id, COMMENT_THREADS + comment.article_id)
 
     return comment
 
 
 @router.delete('/{comment_id}/delete', status_code=204)
 async def delete_comment(
-    comment_id: int, db: Session = Depends(get_db), user = Depends(get_user)):
-    comment = db.query(Comment).filter_by(id=comment_id, user_id=user.id).first()
+    comment_id: int, db: AsyncSession = Depends(get_db), user = Depends(get_user)):
+    comment = await db.scalar(select(Comment).filter_by(id=comment_id, user_id=user.id))
 
     if not comment:
         raise HTTPException(403, detail='Operation cannot be completed')
 
-    db.delete(comment)
-    db.commit()
\ No newline at end of file
+    await db.delete(comment)
+    await adjust_comment_count(db, comment.article_id, -1)
+    await db.commit()
+    await invalidate_responses(
+        *ARTICLE_LISTINGS, ARTICLE_DETAILS + comment.article_id, COMMENT_THREADS + comment.article_id)
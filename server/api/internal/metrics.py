@@ -0,0 +1,21 @@
+from prometheus_client import REGISTRY
+from prometheus_client.core import GaugeMetricFamily
+from db.base import engine
+from db.instrumentation import pool_stats
+from api.user.config import password_hasher
+from api.write_behind import write_behind
+
+
+class StatsCollector:
+    # exports the existing pool and password hasher counters at scrape time
+    def collect(self):
+        for prefix, stats in (
+            ('db_pool', pool_stats.stats(engine.sync_engine.pool)),
+            ('password_hasher', password_hasher.stats()),
+            ('write_behind', write_behind.stats()),
+        ):
+            for name, value in stats.items():
+                yield GaugeMetricFamily(f'{prefix}_{name}', f'{prefix} {name.replace("_", " ")}', value=value)
+
+
+REGISTRY.register(StatsCollector())
@@ -0,0 +1,19 @@
+from fastapi import APIRouter, Depends
+from db.base import engine
+from db.instrumentation import pool_stats
+from api.user.config import check_admin_permission, password_hasher
+from api.write_behind import write_behind
+from api.user.oauth2 import get_user
+
+router = APIRouter()
+
+
+@router.get('/metrics', status_code=200)
+async def get_internal_metrics(user = Depends(get_user)):
+    check_admin_permission(user)
+
+    return {
+        "db_pool": pool_stats.stats(engine.sync_engine.pool),
+        "password_hasher": password_hasher.stats(),
+        "write_behind": write_behind.stats(),
+    }
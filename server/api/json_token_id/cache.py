@@ -0,0 +1,116 @@
+import asyncio
+import logging
+from collections import OrderedDict
+from hashlib import blake2b
+from sqlalchemy import select
+from sqlalchemy.sql import exists
+from sqlalchemy.ext.asyncio import AsyncSession
+from api.json_token_id.model import JsonTokenId
+from db.base import DB_LOCAL
+from utils.broadcast import broadcaster
+from utils.config import settings
+
+logger = logging.getLogger(__name__)
+
+REVOKED_CHANNEL = 'revoked_tokens'
+
+
+class BloomFilter:
+    def __init__(self, size: int, hashes: int):
+        self.size = size
+        self.hashes = hashes
+        self.bits = bytearray((size + 7) // 8)
+
+    def _positions(self, key: str):
+        digest = blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1, h2 = int.from_bytes(digest[:8], 'big'), int.from_bytes(digest[8:], 'big') | 1
+
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, key: str):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: str):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+# a bloom miss proves a token was never revoked; until the first sync every lookup goes to the db
+class RevocationCache:
+    def __init__(self, capacity: int, bloom_size: int, bloom_hashes: int):
+        self.capacity = capacity
+        self.bloom_size = bloom_size
+        self.bloom_hashes = bloom_hashes
+        self.bloom = BloomFilter(bloom_size, bloom_hashes)
+        self.hits: OrderedDict[str, None] = OrderedDict()
+        self.ready = False
+        self._syncing: list[str] | None = None
+
+    def add(self, jti: str):
+        self.bloom.add(jti)
+        self._remember(jti)
+
+        if self._syncing is not None:
+            self._syncing.append(jti)
+
+    def _remember(self, jti: str):
+        self.hits[jti] = None
+        self.hits.move_to_end(jti)
+
+        if len(self.hits) > self.capacity:
+            self.hits.popitem(last=False)
+
+    async def is_revoked(self, db: AsyncSession, jti: str) -> bool:
+        if self.ready and jti not in self.bloom:
+            return False
+
+        if jti in self.hits:
+            self.hits.move_to_end(jti)
+            return True
+
+        revoked = await db.scalar(select(exists().where(JsonTokenId.id == jti)))
+
+        if revoked:
+            self._remember(jti)
+
+        return revoked
+
+    async def revoke(self, jti: str):
+        self.add(jti)
+        await broadcaster.publish(REVOKED_CHANNEL, jti)
+
+    async def sync(self, db: AsyncSession):
+        bloom = BloomFilter(self.bloom_size, self.bloom_hashes)
+        self._syncing = []
+
+        try:
+            for jti in await db.scalars(select(JsonTokenId.id)):
+                bloom.add(jti)
+
+            for jti in self._syncing:
+                bloom.add(jti)
+
+        finally:
+            self._syncing = None
+
+        self.bloom = bloom
+        self.ready = True
+
+    async def sync_forever(self):
+        while True:
+            try:
+                async with DB_LOCAL() as db:
+                    await self.sync(db)
+
+            except Exception:
+                logger.exception('Revoked token sync failed')
+
+            await asyncio.sleep(settings.REVOCATION_SYNC_INTERVAL)
+
+
+revocation_cache = RevocationCache(
+    capacity=settings.REVOCATION_CACHE_SIZE,
+    bloom_size=settings.REVOCATION_BLOOM_SIZE,
+    bloom_hashes=settings.REVOCATION_BLOOM_HASHES
+)
+broadcaster.subscribe(REVOKED_CHANNEL, revocation_cache.add)
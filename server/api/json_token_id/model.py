@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String
+from sqlalchemy import Column, String, TIMESTAMP
 from db.base import Base
 
 
@@ -6,6 +6,7 @@ class JsonTokenId(Base):
 	__tablename__ = 'json_token_ids'
 
 	id = Column(String(255), primary_key=True, nullable=False)
+	expires_at = Column(TIMESTAMP, index=True)
 
 	def __repr__(self) -> str:
 		return f"<JTI id={self.id} />"
\ No newline at end of file
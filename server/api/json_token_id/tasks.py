@@ -0,0 +1,40 @@
+import asyncio
+import logging
+from datetime import datetime
+from sqlalchemy import select, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from api.json_token_id.model import JsonTokenId
+from db.base import DB_LOCAL
+from utils.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+async def prune_expired_jtis(db: AsyncSession, batch_size: int) -> int:
+    pruned = 0
+
+    while True:
+        ids = (await db.scalars(
+            select(JsonTokenId.id).where(JsonTokenId.expires_at < datetime.utcnow()).limit(batch_size))).all()
+
+        if not ids:
+            return pruned
+
+        await db.execute(delete(JsonTokenId).where(JsonTokenId.id.in_(ids)))
+        await db.commit()
+        pruned += len(ids)
+
+        if len(ids) < batch_size:
+            return pruned
+
+
+async def prune_forever():
+    while True:
+        try:
+            async with DB_LOCAL() as db:
+                await prune_expired_jtis(db, settings.JTI_PRUNE_BATCH_SIZE)
+
+        except Exception:
+            logger.exception('Expired token pruning failed')
+
+        await asyncio.sleep(settings.JTI_PRUNE_INTERVAL)
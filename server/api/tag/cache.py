@@ -0,0 +1,66 @@
+import logging
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from api.tag.model import Tag
+from db.base import DB_LOCAL
+from utils.broadcast import broadcaster
+
+logger = logging.getLogger(__name__)
+
+TAGS_CHANNEL = 'tags'
+
+
+# known tags resolve without a query; a miss is checked against the db once before it is rejected,
+# since another worker may have created the tag before its broadcast arrived
+class TagIndex:
+    def __init__(self):
+        self.ids: set[str] = set()
+        self.ready = False
+
+    def apply(self, message: tuple[str, list[str]]):
+        action, tag_ids = message
+
+        if action == 'add':
+            self.ids.update(tag_ids)
+
+        else:
+            self.ids.difference_update(tag_ids)
+
+    async def add(self, *tag_ids: str):
+        await broadcaster.publish(TAGS_CHANNEL, ('add', list(tag_ids)))
+
+    async def remove(self, *tag_ids: str):
+        await broadcaster.publish(TAGS_CHANNEL, ('remove', list(tag_ids)))
+
+    async def sync(self, db: AsyncSession):
+        self.ids = set((await db.scalars(select(Tag.id))).all())
+        self.ready = True
+
+    async def warm(self):
+        try:
+            async with DB_LOCAL() as db:
+                await self.sync(db)
+
+        except Exception:
+            logger.exception('Tag index warm-up failed')
+
+    async def resolve(self, db: AsyncSession, tag_ids: list[str]) -> list[str]:
+        if not self.ready:
+            await self.sync(db)
+
+        tag_ids = list(dict.fromkeys(tag_ids))
+        missing = set(tag_ids) - self.ids
+
+        if missing:
+            self.ids.update((await db.scalars(select(Tag.id).where(Tag.id.in_(missing)))).all())
+            missing -= self.ids
+
+        if missing:
+            raise HTTPException(422, detail=f"Unknown tags: {', '.join(sorted(missing))}")
+
+        return tag_ids
+
+
+tag_index = TagIndex()
+broadcaster.subscribe(TAGS_CHANNEL, tag_index.apply)
@@ -0,0 +1,72 @@
+from fastapi import HTTPException
+from sqlalchemy import select, insert, delete, literal
+from sqlalchemy.ext.asyncio import AsyncSession
+from api.tag.model import Tag, tag_closure_table as closure
+
+
+def subtree_ids(tag_id: str):
+    return select(closure.c.descendant_id).where(closure.c.ancestor_id == tag_id)
+
+
+async def add_tag(db: AsyncSession, tag_id: str, parent_id: str | None):
+    await db.execute(insert(closure).values(ancestor_id=tag_id, descendant_id=tag_id, depth=0))
+
+    if parent_id:
+        await db.execute(insert(closure).from_select(
+            ['ancestor_id', 'descendant_id', 'depth'],
+            select(closure.c.ancestor_id, literal(tag_id), closure.c.depth + 1)
+            .where(closure.c.descendant_id == parent_id)
+        ))
+
+
+async def move_tag(db: AsyncSession, tag_id: str, parent_id: str | None):
+    subtree = (await db.execute(
+        select(closure.c.descendant_id, closure.c.depth).where(closure.c.ancestor_id == tag_id))).all()
+    descendants = [descendant for descendant, _ in subtree]
+
+    if parent_id in descendants:
+        raise HTTPException(400, detail='Tag cannot be moved under itself')
+
+    await db.execute(
+        delete(closure)
+        .where(closure.c.descendant_id.in_(descendants), closure.c.ancestor_id.not_in(descendants))
+    )
+
+    if parent_id:
+        ancestors = (await db.execute(
+            select(closure.c.ancestor_id, closure.c.depth).where(closure.c.descendant_id == parent_id))).all()
+
+        await db.execute(insert(closure), [
+            {"ancestor_id": ancestor, "descendant_id": descendant, "depth": ancestor_depth + depth + 1}
+            for ancestor, ancestor_depth in ancestors
+            for descendant, depth in subtree
+        ])
+
+
+async def remove_tag(db: AsyncSession, tag_id: str) -> list[str]:
+    descendants = (await db.scalars(subtree_ids(tag_id))).all()
+
+    await db.execute(delete(closure).where(closure.c.descendant_id.in_(descendants)))
+
+    return descendants
+
+
+async def rebuild_closure(db: AsyncSession) -> int:
+    parents = dict((await db.execute(select(Tag.id, Tag.parent_id))).all())
+    rows = []
+
+    for tag_id in parents:
+        ancestor, depth = tag_id, 0
+
+        while ancestor is not None and depth <= len(parents):
+            rows.append({"ancestor_id": ancestor, "descendant_id": tag_id, "depth": depth})
+            ancestor, depth = parents.get(ancestor), depth + 1
+
+    await db.execute(delete(closure))
+
+    if rows:
+        await db.execute(insert(closure), rows)
+
+    await db.commit()
+
+    return len(parents)
@@ -1,7 +1,18 @@
-from sqlalchemy import Column, String, func, TIMESTAMP, ForeignKey
+from sqlalchemy import Column, String, Integer, func, TIMESTAMP, ForeignKey, Table, Index
 from db.base import Base
 
 
+# one row per (ancestor, descendant) pair including each tag with itself at depth 0
+tag_closure_table = Table(
+    'tag_closure',
+    Base.metadata,
+    Column('ancestor_id', String(255), ForeignKey('tags.id', ondelete='CASCADE'), primary_key=True),
+    Column('descendant_id', String(255), ForeignKey('tags.id', ondelete='CASCADE'), primary_key=True),
+    Column('depth', Integer, nullable=False),
+    Index('ix_tag_closure_descendant_id', 'descendant_id')
+)
+
+
 class Tag(Base):
     __tablename__ = 'tags'
 
@@ -1,69 +1,120 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from api.tag.model import Tag
-from api.tag.schemas import TagResponse, TagSchema, TagUpdateSchema
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from api.tag.model import Tag, tag_closure_table
+from api.tag.schemas import TagResponse, TagSchema, TagUpdateSchema, TagTreeResponse
+from api.tag.closure import add_tag, move_tag, remove_tag
+from api.tag.cache import tag_index
 from typing import List
 from utils.session import get_db
+from utils.cache import invalidate_responses, ARTICLE_LISTINGS, ARTICLE_DETAILS, TAG_LISTINGS
+from utils.pagination import Page, paginate, page_results
 from api.user.config import check_admin_permission, check_for_conflict
 from api.user.oauth2 import get_user
-from api.article.model import Article
-from api.article.schemas import ArticleResponse
+from api.article.model import Article, association_table
+from api.article.schemas import ArticleResponse, ArticleSummaryResponse, ArticleView
+from api.article.loaders import article_loader_options, article_summary_loader_options
 
 router = APIRouter()
 
 
 @router.post('/create', status_code=201, response_model=TagResponse)
-async def create_tag(schema: TagSchema, db: Session = Depends(get_db), user = Depends(get_user)):
+async def create_tag(schema: TagSchema, db: AsyncSession = Depends(get_db), user = Depends(get_user)):
     check_admin_permission(user)
-    check_for_conflict(db, Tag, 'name', schema.name)
+    await check_for_conflict(db, Tag, 'name', schema.name)
 
     tag = Tag(**schema.model_dump())
     tag.id = schema.name.lower().strip().replace(' ', '-')
 
     db.add(tag)
-    db.commit()
+    await db.flush()
+    await add_tag(db, tag.id, tag.parent_id)
+    await db.commit()
+    await tag_index.add(tag.id)
+    await invalidate_responses(*TAG_LISTINGS)
 
     return tag
 
 
 @router.put('/{tag_id}/update', status_code=200, response_model=TagResponse)
 async def update_tag(
-    tag_id: str, schema: TagUpdateSchema, db: Session = Depends(get_db), user = Depends(get_user)):
+    tag_id: str, schema: TagUpdateSchema, db: AsyncSession = Depends(get_db), user = Depends(get_user)):
     check_admin_permission(user)
 
-    tag = db.query(Tag).get(tag_id)
+    tag = await db.get(Tag, tag_id)
 
     if not tag:
         raise HTTPException(404, detail='Tag not found')
 
     form = schema.model_dump(exclude_unset=True)
+
+    if 'parent_id' in form and form['parent_id'] != tag.parent_id:
+        await move_tag(db, tag.id, form['parent_id'])
+
     for key, value in form.items():
         setattr(tag, key, value)
 
-    db.commit()
-    db.refresh(tag)
+    await db.commit()
+    await db.refresh(tag)
+    await invalidate_responses(*TAG_LISTINGS, *ARTICLE_LISTINGS, ARTICLE_DETAILS)
 
     return tag
 
 
 @router.delete('/{tag_id}/delete', status_code=204)
-async def delete_tag(tag_id: str, db: Session = Depends(get_db), user = Depends(get_user)):
+async def delete_tag(tag_id: str, db: AsyncSession = Depends(get_db), user = Depends(get_user)):
     check_admin_permission(user)
 
-    tag = db.query(Tag).get(tag_id)
+    tag = await db.get(Tag, tag_id)
 
     if not tag:
         raise HTTPException(404, detail='Tag not found')
 
-    db.delete(tag) 
-    db.commit()
+    # children go with their parent through the tags.parent_id cascade
+    removed = await remove_tag(db, tag.id)
+    await db.delete(tag) 
+    await db.commit()
+    await tag_index.remove(tag.id, *removed)
+    await invalidate_responses(*TAG_LISTINGS, *ARTICLE_LISTINGS, ARTICLE_DETAILS)
+
+
+@router.get('/articles/{tag_id}', status_code=200,
+            response_model=List[ArticleResponse] | List[ArticleSummaryResponse])
+async def get_articles_by_tag(
+    tag_id: str, response: Response, view: ArticleView = 'full', include_subtags: bool = False,
+    page: Page = Depends(), db: AsyncSession = Depends(get_db)):
+    options = article_summary_loader_options() if view == 'summary' else article_loader_options()
+    columns = [Article.created_at, Article.id]
+    stmt = select(Article).options(*options)
+
+    if include_subtags:
+        stmt = stmt.where(Article.id.in_(
+            select(association_table.c.article_id)
+            .join(tag_closure_table, tag_closure_table.c.descendant_id == association_table.c.tag_id)
+            .where(tag_closure_table.c.ancestor_id == tag_id)
+        ))
+
+    else:
+        stmt = stmt.where(Article.tags.any(id=tag_id))
+
+    articles = (await db.scalars(paginate(stmt, columns, page))).all()
+
+    return page_results(articles, columns, page, response)
+
+
+@router.get('/tree', status_code=200, response_model=List[TagTreeResponse])
+async def get_tag_tree(db: AsyncSession = Depends(get_db)):
+    nodes = {tag.id: TagTreeResponse.model_validate(tag, from_attributes=True)
+             for tag in await db.scalars(select(Tag).order_by(Tag.name))}
+    roots = []
 
+    for node in nodes.values():
+        parent = nodes.get(node.parent_id)
+        (parent.children if parent else roots).append(node)
 
-@router.get('/articles/{tag_id}', status_code=200, response_model=List[ArticleResponse])
-async def get_articles_by_tag(tag_id: str, db: Session = Depends(get_db)):
-    return db.query(Article).filter(Article.tags.any(id=tag_id)).all()
+    return roots
 
 
 @router.get('/{tag_id}', status_code=200, response_model=TagResponse)
-async def get_tag(tag_id: str, db: Session = Depends(get_db)):
-    return db.query(Tag).get(tag_id)
\ No newline at end of file
+async def get_tag(tag_id: str, db: AsyncSession = Depends(get_db)):
+    return await db.get(Tag, tag_id)
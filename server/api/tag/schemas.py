@@ -1,4 +1,5 @@
 from pydantic import BaseModel
+from typing import List
 
 
 class TagSchema(BaseModel):
@@ -15,4 +16,11 @@ class TagResponse(BaseModel):
     name: str
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class TagTreeResponse(BaseModel):
+    id: str
+    parent_id: str | None
+    name: str
+    children: List['TagTreeResponse'] = []
@@ -1,22 +1,69 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
 from passlib.context import CryptContext
 from fastapi import HTTPException
-from sqlalchemy.orm import Session
-from typing import Type
-from sqlalchemy.sql import exists
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Type, Callable
+from sqlalchemy.sql import exists, select
+from utils.config import settings
 
 pwd_context = CryptContext(schemes=['bcrypt'], deprecated='auto')
 
-def hash_password(password: str):
-    return pwd_context.hash(password)
 
-def verify_password(plain_password: str, hashed_password: str):
-    return pwd_context.verify(plain_password, hashed_password)
+class PasswordHasher:
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bcrypt')
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    async def run(self, func: Callable, *args):
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise HTTPException(503, detail='Server is busy, try again shortly', headers={"Retry-After": "1"})
+
+        self.pending += 1
+        start = perf_counter()
+
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+        finally:
+            elapsed = perf_counter() - start
+            self.pending -= 1
+            self.completed += 1
+            self.total_seconds += elapsed
+            self.max_seconds = max(self.max_seconds, elapsed)
+
+    def stats(self):
+        return {
+            "in_flight": min(self.pending, self.workers),
+            "queue_depth": max(self.pending - self.workers, 0),
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_seconds": self.total_seconds / self.completed if self.completed else 0.0,
+            "max_seconds": self.max_seconds,
+        }
+
+
+password_hasher = PasswordHasher(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_MAX_PENDING)
+
+async def hash_password(password: str):
+    return await password_hasher.run(pwd_context.hash, password)
+
+async def verify_password(plain_password: str, hashed_password: str):
+    return await password_hasher.run(pwd_context.verify, plain_password, hashed_password)
 
 def check_admin_permission(user):
     if user.role != 'admin':
         raise HTTPException(403, detail='You do not have permission to access this page')
 
 
-def check_for_conflict(db: Session, model: Type, field: str, value: str):
-    if db.query(exists().where(getattr(model, field) == value)).scalar():
+async def check_for_conflict(db: AsyncSession, model: Type, field: str, value: str):
+    if await db.scalar(select(exists().where(getattr(model, field) == value))):
         raise HTTPException(409, detail=f"{model.__name__} already exists")
\ No newline at end of file
@@ -1,10 +1,11 @@
-from sqlalchemy import Column, String, Enum, TIMESTAMP, func
+from sqlalchemy import Column, String, Enum, TIMESTAMP, func, Index
 from sqlalchemy.orm import relationship
 from db.base import Base
 
 
 class User(Base):
     __tablename__ = 'users'
+    __table_args__ = (Index('ix_users_created_at_id', 'created_at', 'id'),)
     
     id = Column(String(255), primary_key=True)
     first_name = Column(String(255), nullable=False)
@@ -2,15 +2,18 @@ from fastapi import HTTPException, Depends
 from fastapi.security import OAuth2PasswordBearer
 from cryptography.hazmat.primitives import serialization
 from cryptography.hazmat.backends import default_backend
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from utils.session import get_db
 from utils.config import settings
+from utils.metrics import TOKEN_VERIFY_SECONDS
 from datetime import datetime, timedelta
 from secrets import token_hex
-from jose import jwt, JWTError, ExpiredSignatureError
+from jose import jwt, jwk, JWTError, ExpiredSignatureError
+from collections import OrderedDict
+from hashlib import sha256
+from functools import cache
 from api.user.schemas import JWTResponse
-from api.json_token_id.model import JsonTokenId
-from sqlalchemy.sql import exists
+from api.json_token_id.cache import revocation_cache
 
 def load_private_key(route: str, password: str):
     try:
@@ -39,12 +42,50 @@ def load_public_key(route: str):
     
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl='login')
 
-# load keys
-access_private_key = load_private_key('keys/access/private_key.pem', settings.ACCESS_KEY)
-refresh_private_key = load_private_key('keys/refresh/private_key.pem', settings.REFRESH_KEY)
+# keys are decrypted and parsed into jose key objects on first use, then shared for the life of the process
+@cache
+def access_private_key():
+    return jwk.construct(load_private_key('keys/access/private_key.pem', settings.ACCESS_KEY), settings.JWT_ALGORITHM)
 
-access_public_key = load_public_key('keys/access/public_key.pem')
-refresh_public_key = load_public_key('keys/refresh/public_key.pem')
+@cache
+def refresh_private_key():
+    return jwk.construct(load_private_key('keys/refresh/private_key.pem', settings.REFRESH_KEY), settings.JWT_ALGORITHM)
+
+@cache
+def access_public_key():
+    return jwk.construct(load_public_key('keys/access/public_key.pem'), settings.JWT_ALGORITHM)
+
+@cache
+def refresh_public_key():
+    return jwk.construct(load_public_key('keys/refresh/public_key.pem'), settings.JWT_ALGORITHM)
+
+# verified token cache
+class VerifiedTokenCache:
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.entries: OrderedDict[tuple, JWTResponse] = OrderedDict()
+
+    def get(self, key: tuple):
+        payload = self.entries.get(key)
+
+        if payload is None:
+            return None
+
+        if payload.exp <= datetime.utcnow():
+            del self.entries[key]
+            return None
+
+        self.entries.move_to_end(key)
+        return payload
+
+    def put(self, key: tuple, payload: JWTResponse):
+        self.entries[key] = payload
+        self.entries.move_to_end(key)
+
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+verified_tokens = VerifiedTokenCache(settings.TOKEN_CACHE_SIZE)
 
 # create token
 def create_token(data: dict, expiry: int, private_key):
@@ -56,15 +97,23 @@ def create_token(data: dict, expiry: int, private_key):
 		'jti': token_hex(32)
 	})
     
-    return jwt.encode(to_encode, private_key, algorithm='RS256')
+    return jwt.encode(to_encode, private_key, algorithm=settings.JWT_ALGORITHM)
 
 # verify token
+@TOKEN_VERIFY_SECONDS.time()
 def verify_token(token: str, public_key, credential_exception):
+    cache_key = (public_key, sha256(token.encode('utf-8')).digest())
+    cached = verified_tokens.get(cache_key)
+
+    if cached:
+        return cached
+
     try:
-        payload = jwt.decode(token, public_key, algorithms=['RS256'])
+        payload = jwt.decode(token, public_key, algorithms=[settings.JWT_ALGORITHM])
         id: str = payload.get('id')
         jti: str = payload.get('jti')
         role: str = payload.get('role')
+        exp = datetime.utcfromtimestamp(payload.get('exp'))
 
     except FileNotFoundError:
         raise HTTPException(500, detail='Public key not found')
@@ -72,19 +121,22 @@ def verify_token(token: str, public_key, credential_exception):
     except JWTError:
         raise credential_exception
 
-    return JWTResponse(id=id, jti=jti, role=role)
+    payload = JWTResponse(id=id, jti=jti, role=role, exp=exp)
+    verified_tokens.put(cache_key, payload)
+
+    return payload
 
 # get user
-async def get_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def get_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)):
     credential_exception = HTTPException(
 		401,
 		detail='Could not validate credentials',
 		headers={"WWW-Authenticate": "Bearer"}
 	)
 
-    payload = verify_token(token, public_key=access_public_key, credential_exception=credential_exception)
+    payload = verify_token(token, public_key=access_public_key(), credential_exception=credential_exception)
     
-    if db.query(exists().where(getattr(JsonTokenId, 'id') == payload.jti)).scalar():
+    if await revocation_cache.is_revoked(db, payload.jti):
         raise HTTPException(
         401,
         detail='Token Expired',
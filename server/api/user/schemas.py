@@ -5,6 +5,7 @@ class JWTResponse(BaseModel):
     id: str 
     jti: str
     role: str
+    exp: datetime
 
     class Config:
         from_attributes = True
@@ -1,34 +1,76 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, insert, delete
+from sqlalchemy.exc import IntegrityError
+from typing import List
 from utils.session import get_db
+from utils.cache import invalidate_responses, ARTICLE_LISTINGS, ARTICLE_DETAILS
 from api.user.oauth2 import get_user
 from api.vote.model import Vote
-from api.vote.schemas import VoteOutcome, VoteCheck
+from api.vote.schemas import VoteOutcome, VoteCheck, VoteCheckSchema
 from api.article.model import Article
+from api.article.counters import adjust_vote_count
+from api.write_behind import write_behind
 from sqlalchemy.sql import exists
 
 router = APIRouter()
 
 
+@router.post('/check', status_code=200, response_model=List[VoteCheck])
+async def check_votes(schema: VoteCheckSchema, db: AsyncSession = Depends(get_db), user = Depends(get_user)):
+    voted = set(await db.scalars(
+        select(Vote.article_id).where(Vote.user_id == user.id, Vote.article_id.in_(schema.article_ids))))
+    queued = {article_id: write_behind.queued_vote(article_id, user.id) for article_id in schema.article_ids}
+
+    return [
+        {"article_id": article_id, "vote_check": article_id in voted if queued[article_id] is None else queued[article_id]}
+        for article_id in schema.article_ids
+    ]
+
+
+# insert first and fall back to delete on conflict: the votes primary key makes each toggle atomic, and the
+# articles foreign key replaces loading the article to check it exists
 @router.get('/{article_id}', status_code=200, response_model=VoteOutcome)
-async def vote_on_article(article_id: str, db: Session = Depends(get_db), user = Depends(get_user)):
-    article = db.query(Article).get(article_id)
+async def vote_on_article(article_id: str, db: AsyncSession = Depends(get_db), user = Depends(get_user)):
+    if write_behind.accepting():
+        voted = write_behind.queued_vote(article_id, user.id)
+
+        if voted is None:
+            row = (await db.execute(
+                select(Vote.user_id)
+                .select_from(Article)
+                .outerjoin(Vote, (Vote.article_id == Article.id) & (Vote.user_id == user.id))
+                .where(Article.id == article_id)
+            )).first()
+
+            if row is None:
+                raise HTTPException(404, detail='Article not found')
+
+            voted = row.user_id is not None
 
-    if not article:
-        raise HTTPException(404, detail='Article not found')
-    
-    query = db.query(Vote).filter_by(article_id=article_id, user_id=user.id).scalar()
+        write_behind.set_vote(article_id, user.id, not voted)
 
-    if not query:
-        vote = Vote(article_id=article_id, user_id=user.id)
+        return {"state": 'remove' if voted else 'add', "user_id": user.id, "article_id": article_id}
 
-        db.add(vote)
+    try:
+        await db.execute(insert(Vote).values(article_id=article_id, user_id=user.id))
+        await adjust_vote_count(db, article_id, 1)
         state = 'add'
-    
-    else:
-        db.delete(query)
+
+    except IntegrityError:
+        await db.rollback()
+
+        removed = await db.execute(delete(Vote).where(Vote.article_id == article_id, Vote.user_id == user.id))
+
+        if removed.rowcount:
+            await adjust_vote_count(db, article_id, -1)
+
+        elif not await db.scalar(select(exists().where(Article.id == article_id))):
+            raise HTTPException(404, detail='Article not found')
+
         state = 'remove'
 
-    db.commit()
+    await db.commit()
+    await invalidate_responses(*ARTICLE_LISTINGS, ARTICLE_DETAILS + article_id)
 
-    return {"state": state, "user_id": user.id, "article_id": article_id}
\ No newline at end of file
+    return {"state": state, "user_id": user.id, "article_id": article_id}
@@ -1,4 +1,5 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from typing import List
 
 
 class VoteResponse(BaseModel):
@@ -18,7 +19,12 @@ class VoteOutcome(BaseModel):
         from_attributes = True
 
 
+class VoteCheckSchema(BaseModel):
+    article_ids: List[str] = Field(max_length=100)
+
+
 class VoteCheck(BaseModel):
+    article_id: str
     vote_check: bool
 
     class Config:
@@ -0,0 +1,176 @@
+import asyncio
+import logging
+from collections import Counter
+from datetime import datetime
+from sqlalchemy import insert, delete, update, tuple_
+from db.base import DB_LOCAL
+from utils.config import settings
+from utils.cache import invalidate_responses, ARTICLE_LISTINGS, ARTICLE_DETAILS
+from api.user.model import User
+from api.vote.model import Vote
+from api.comment.model import Comment
+from api.article.counters import adjust_comment_count, recount_votes
+
+logger = logging.getLogger(__name__)
+
+
+def batches(items: list, size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+# acknowledged writes are held in memory until flushed, so a crash loses at most max_pending of them;
+# once full, callers fall back to writing synchronously
+class WriteBehindQueue:
+    def __init__(self, max_pending: int, batch_size: int, interval: float):
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.interval = interval
+        self.votes: dict[tuple[str, str], bool] = {}
+        self.logins: dict[str, datetime] = {}
+        self.comments: list[tuple[Comment, asyncio.Future]] = []
+        self.wakeup = asyncio.Event()
+        self.lock = asyncio.Lock()
+        self.task = None
+        self.stopping = False
+        self.flushed = 0
+        self.failed = 0
+
+    @property
+    def pending(self) -> int:
+        return len(self.votes) + len(self.logins) + len(self.comments)
+
+    def accepting(self) -> bool:
+        return self.task is not None and not self.stopping and self.pending < self.max_pending
+
+    def queued_vote(self, article_id: str, user_id: str) -> bool | None:
+        return self.votes.get((article_id, user_id))
+
+    # repeated toggles coalesce into the final state
+    def set_vote(self, article_id: str, user_id: str, voted: bool):
+        self.votes[(article_id, user_id)] = voted
+        self.notify()
+
+    def touch_login(self, user_id: str, at: datetime):
+        self.logins[user_id] = at
+        self.notify()
+
+    # comments need their database id in the response, so the caller waits for its batch to commit
+    async def add_comment(self, comment: Comment) -> int:
+        future = asyncio.get_running_loop().create_future()
+        self.comments.append((comment, future))
+        self.wakeup.set()
+
+        return await future
+
+    def notify(self):
+        if self.pending >= self.batch_size:
+            self.wakeup.set()
+
+    async def flush(self):
+        async with self.lock:
+            votes, self.votes = list(self.votes.items()), {}
+            logins, self.logins = list(self.logins.items()), {}
+            comments, self.comments = self.comments, []
+
+            for batch in batches(comments, self.batch_size):
+                await self.run_batch(self.flush_comments, batch)
+
+            for batch in batches(votes, self.batch_size):
+                await self.run_batch(self.flush_votes, batch)
+
+            for batch in batches(logins, self.batch_size):
+                await self.run_batch(self.flush_logins, batch)
+
+    async def run_batch(self, flush, batch: list):
+        try:
+            await flush(batch)
+            self.flushed += len(batch)
+
+        except Exception:
+            self.failed += len(batch)
+            logger.exception('Write-behind batch of %d dropped', len(batch))
+
+    async def flush_comments(self, batch: list):
+        try:
+            async with DB_LOCAL() as db:
+                db.add_all([comment for comment, _ in batch])
+                await db.flush()
+
+                for article_id, added in sorted(Counter(comment.article_id for comment, _ in batch).items()):
+                    await adjust_comment_count(db, article_id, added)
+
+                await db.commit()
+
+        except Exception as error:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+
+            raise
+
+        for comment, future in batch:
+            if not future.done():
+                future.set_result(comment.id)
+
+    async def flush_votes(self, batch: list):
+        added = [{"article_id": article_id, "user_id": user_id} for (article_id, user_id), voted in batch if voted]
+        removed = [key for key, voted in batch if not voted]
+        article_ids = sorted({article_id for (article_id, _), _ in batch})
+
+        async with DB_LOCAL() as db:
+            if added:
+                await db.execute(
+                    insert(Vote).prefix_with('IGNORE', dialect='mysql').prefix_with('OR IGNORE', dialect='sqlite'),
+                    added)
+
+            if removed:
+                await db.execute(delete(Vote).where(tuple_(Vote.article_id, Vote.user_id).in_(removed)))
+
+            await recount_votes(db, article_ids)
+            await db.commit()
+
+        await invalidate_responses(*ARTICLE_LISTINGS, *[ARTICLE_DETAILS + article_id for article_id in article_ids])
+
+    async def flush_logins(self, batch: list):
+        async with DB_LOCAL() as db:
+            await db.execute(update(User), [{"id": user_id, "last_login": at} for user_id, at in batch])
+            await db.commit()
+
+    async def run_forever(self):
+        while not self.stopping:
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), self.interval)
+
+            except asyncio.TimeoutError:
+                pass
+
+            self.wakeup.clear()
+            await self.flush()
+
+    def start(self):
+        self.stopping = False
+        self.task = asyncio.create_task(self.run_forever())
+
+    async def drain(self):
+        if self.task is None:
+            return
+
+        self.stopping = True
+        self.wakeup.set()
+        await self.task
+        self.task = None
+
+        while self.pending:
+            await self.flush()
+
+    def stats(self):
+        return {
+            "pending": self.pending,
+            "flushed": self.flushed,
+            "failed": self.failed,
+        }
+
+
+write_behind = WriteBehindQueue(
+    settings.WRITE_BEHIND_MAX_PENDING, settings.WRITE_BEHIND_BATCH_SIZE, settings.WRITE_BEHIND_FLUSH_INTERVAL)
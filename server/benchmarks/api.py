@@ -0,0 +1,233 @@
+import argparse
+import asyncio
+import json
+import sys
+from datetime import datetime
+from random import Random
+from statistics import mean, quantiles
+from time import perf_counter, process_time
+import httpx
+from sqlalchemy import select
+from db.base import DB_LOCAL, engine
+from db.instrumentation import count_queries
+from utils.cache import response_cache
+from utils.config import settings
+from api.user.model import User
+from api.user.oauth2 import create_token, access_private_key
+from api.tag.model import Tag
+from api.article.model import Article
+from benchmarks.seed import Volumes, WORDS, seed, reset_schema
+from benchmarks.traffic import Fixtures, Call, MIXES, plan
+
+FIXTURE_LIMIT = 1000
+TOKEN_USERS = 50
+COMPARED = (('p50_ms', 1), ('p95_ms', 1), ('p99_ms', 1), ('queries_per_request', 1), ('throughput_rps', -1),
+            ('bytes_per_request', 1), ('cpu_ms_per_request', 1))
+
+
+def percentile(cuts: list, samples: list, p: int) -> float:
+    return cuts[p - 1] if cuts else (samples[0] if samples else 0.0)
+
+
+def summarize(samples: list, elapsed: float) -> dict:
+    latencies = [latency * 1000 for latency, _, _, _ in samples]
+    cuts = quantiles(latencies, n=100, method='inclusive') if len(latencies) > 1 else []
+
+    return {
+        "count": len(samples),
+        "errors": sum(status >= 400 for _, _, status, _ in samples),
+        "throughput_rps": round(len(samples) / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(mean(latencies), 3) if latencies else 0.0,
+        "p50_ms": round(percentile(cuts, latencies, 50), 3),
+        "p95_ms": round(percentile(cuts, latencies, 95), 3),
+        "p99_ms": round(percentile(cuts, latencies, 99), 3),
+        "queries_per_request": round(mean(queries for _, queries, _, _ in samples), 2) if samples else 0.0,
+        "bytes_per_request": round(mean(size for _, _, _, size in samples)) if samples else 0,
+    }
+
+
+async def load_fixtures() -> Fixtures:
+    async with DB_LOCAL() as db:
+        article_ids = (await db.scalars(select(Article.id).limit(FIXTURE_LIMIT))).all()
+        tags = (await db.execute(select(Tag.id, Tag.parent_id))).all()
+        users = (await db.execute(select(User.id, User.role).limit(TOKEN_USERS))).all()
+
+    if not article_ids or not tags or not users:
+        sys.exit('No data to benchmark against, run the seed command first')
+
+    return Fixtures(
+        article_ids=list(article_ids),
+        tag_ids=[tag_id for tag_id, _ in tags],
+        root_tag_ids=[tag_id for tag_id, parent_id in tags if parent_id is None] or [tags[0][0]],
+        words=WORDS,
+        tokens=[create_token(data={"id": user_id, "role": role}, expiry=settings.ACCESS_EXPIRY,
+                             private_key=access_private_key()) for user_id, role in users],
+    )
+
+
+async def replay(client: httpx.AsyncClient, calls: list[Call], fixtures: Fixtures, concurrency: int, rng: Random):
+    samples: dict[str, list] = {}
+    queue = iter(calls)
+
+    async def worker():
+        for call in queue:
+            headers = {"Authorization": f'Bearer {rng.choice(fixtures.tokens)}'} if call.auth else None
+
+            # bodies are read raw so the size is what went over the wire and decoding doesn't count as cpu
+            with count_queries() as queries:
+                start = perf_counter()
+
+                async with client.stream(call.method, call.url, json=call.json, headers=headers) as response:
+                    size = sum([len(chunk) async for chunk in response.aiter_raw()])
+
+                latency = perf_counter() - start
+
+            samples.setdefault(call.name, []).append((latency, queries.count, response.status_code, size))
+
+    start, cpu = perf_counter(), process_time()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+
+    return samples, perf_counter() - start, process_time() - cpu
+
+
+async def run(args) -> dict:
+    from main import app
+
+    if args.no_response_cache:
+        response_cache.max_entries = 0
+
+    rng = Random(args.seed)
+    fixtures = await load_fixtures()
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+
+    headers = {"Accept-Encoding": args.accept_encoding}
+
+    async with app.router.lifespan_context(app), \
+            httpx.AsyncClient(transport=transport, base_url='http://benchmark', headers=headers) as client:
+        await replay(client, plan(args.mix, args.warmup, fixtures, rng), fixtures, args.concurrency, rng)
+        samples, elapsed, cpu = await replay(
+            client, plan(args.mix, args.requests, fixtures, rng), fixtures, args.concurrency, rng)
+
+    every = [sample for route in samples.values() for sample in route]
+    # one process serves and replays, so cpu is only attributable to the run as a whole
+    total = {**summarize(every, elapsed), "cpu_ms_per_request": round(cpu * 1000 / len(every), 3) if every else 0.0}
+
+    return {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec='seconds'),
+            "mix": args.mix,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "response_cache": not args.no_response_cache,
+            "accept_encoding": args.accept_encoding,
+            "elapsed_seconds": round(elapsed, 3),
+        },
+        "total": total,
+        "routes": {name: summarize(route, elapsed) for name, route in sorted(samples.items())},
+    }
+
+
+def print_report(report: dict):
+    print(f"{'route':<24}{'count':>7}{'errors':>7}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+          f"{'queries':>9}{'bytes':>10}")
+
+    for name, row in [*report["routes"].items(), ('TOTAL', report["total"])]:
+        print(f"{name:<24}{row['count']:>7}{row['errors']:>7}{row['throughput_rps']:>10}"
+              f"{row['p50_ms']:>10}{row['p95_ms']:>10}{row['p99_ms']:>10}{row['queries_per_request']:>9}"
+              f"{row['bytes_per_request']:>10}")
+
+    print(f"cpu per request: {report['total']['cpu_ms_per_request']} ms")
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> bool:
+    regressed = False
+    print(f"\n{'route':<24}{'metric':<22}{'baseline':>12}{'current':>12}{'change':>10}")
+
+    for name, row in [*current["routes"].items(), ('TOTAL', current["total"])]:
+        before = baseline["total"] if name == 'TOTAL' else baseline["routes"].get(name)
+
+        if before is None:
+            continue
+
+        for metric, direction in COMPARED:
+            if metric not in before or metric not in row:
+                continue
+
+            old, new = before[metric], row[metric]
+            change = (new - old) / old if old else (1.0 if new else 0.0)
+            worse = change * direction > threshold
+            regressed |= worse
+            print(f"{name:<24}{metric:<22}{old:>12}{new:>12}{change:>+10.1%}{'  REGRESSION' if worse else ''}")
+
+    return regressed
+
+
+async def seed_command(args):
+    if args.reset:
+        await reset_schema()
+
+    volumes = Volumes(args.users, args.tags, args.articles, args.votes, args.comments, args.paragraphs)
+
+    async with DB_LOCAL() as db:
+        seeded = await seed(db, volumes, Random(args.seed))
+
+    print(json.dumps(seeded))
+
+
+async def run_command(args):
+    report = await run(args)
+    print_report(report)
+
+    if args.save:
+        with open(args.save, 'w') as file:
+            json.dump(report, file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as file:
+            if compare(json.load(file), report, args.threshold):
+                sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Seed a scratch database and replay API traffic in-process')
+    commands = parser.add_subparsers(dest='command', required=True)
+    defaults = Volumes()
+
+    seeder = commands.add_parser('seed', help='Insert benchmark users, tags, articles, votes and comments')
+    seeder.add_argument('--reset', action='store_true', help='drop and recreate every table first')
+    seeder.add_argument('--users', type=int, default=defaults.users)
+    seeder.add_argument('--tags', type=int, default=defaults.tags)
+    seeder.add_argument('--articles', type=int, default=defaults.articles)
+    seeder.add_argument('--votes', type=int, default=defaults.votes)
+    seeder.add_argument('--comments', type=int, default=defaults.comments)
+    seeder.add_argument('--paragraphs', type=int, default=defaults.paragraphs, help='paragraphs per article body')
+    seeder.add_argument('--seed', type=int, default=0)
+    seeder.set_defaults(handler=seed_command)
+
+    runner = commands.add_parser('run', help='Replay a traffic mix and report per-route latency')
+    runner.add_argument('--mix', choices=MIXES, default='read')
+    runner.add_argument('--requests', type=int, default=2000)
+    runner.add_argument('--warmup', type=int, default=100)
+    runner.add_argument('--concurrency', type=int, default=8)
+    runner.add_argument('--no-response-cache', action='store_true')
+    runner.add_argument('--accept-encoding', default='br, gzip', help="sent on every request, 'identity' to disable")
+    runner.add_argument('--seed', type=int, default=0)
+    runner.add_argument('--save', help='write the report to this JSON file')
+    runner.add_argument('--compare', help='diff against a saved JSON baseline, exit 1 on regression')
+    runner.add_argument('--threshold', type=float, default=0.10, help='allowed relative slowdown, default 10%%')
+    runner.set_defaults(handler=run_command)
+
+    args = parser.parse_args()
+
+    async def execute():
+        try:
+            await args.handler(args)
+
+        finally:
+            await engine.dispose()
+
+    asyncio.run(execute())
+
+
+if __name__ == '__main__':
+    main()
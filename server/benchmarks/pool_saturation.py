@@ -0,0 +1,73 @@
+import argparse
+import asyncio
+import json
+from statistics import quantiles
+from time import perf_counter
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from db.base import engine
+from db.instrumentation import pool_stats
+
+
+async def worker(hold: float, waits: list, outcomes: dict):
+    start = perf_counter()
+
+    try:
+        async with engine.connect() as conn:
+            waits.append(perf_counter() - start)
+            await conn.execute(text('SELECT 1'))
+            await asyncio.sleep(hold)
+
+        outcomes['completed'] += 1
+
+    except PoolTimeoutError:
+        outcomes['timed_out'] += 1
+
+
+async def saturate(concurrency: int, hold: float):
+    pool = engine.sync_engine.pool
+    waits, outcomes, peak = [], {'completed': 0, 'timed_out': 0}, {'checked_out': 0, 'overflow': 0}
+
+    async def sample():
+        while True:
+            peak['checked_out'] = max(peak['checked_out'], pool.checkedout())
+            peak['overflow'] = max(peak['overflow'], pool.overflow())
+            await asyncio.sleep(0.005)
+
+    sampler = asyncio.create_task(sample())
+    start = perf_counter()
+    await asyncio.gather(*[worker(hold, waits, outcomes) for _ in range(concurrency)])
+    elapsed = perf_counter() - start
+    sampler.cancel()
+
+    cuts = quantiles(waits, n=100) if len(waits) > 1 else waits * 99 or [0.0] * 99
+
+    return {
+        "concurrency": concurrency,
+        "hold_seconds": hold,
+        "elapsed_seconds": round(elapsed, 3),
+        **outcomes,
+        "peak": peak,
+        "wait_p50": round(cuts[49], 4),
+        "wait_p95": round(cuts[94], 4),
+        "wait_p99": round(cuts[98], 4),
+        "pool": pool_stats.stats(pool),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description='Hold pooled connections concurrently to show pool saturation')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[10, 30, 60, 120])
+    parser.add_argument('--hold', type=float, default=0.5, help='seconds each task keeps its connection')
+    args = parser.parse_args()
+
+    try:
+        for concurrency in args.concurrency:
+            print(json.dumps(await saturate(concurrency, args.hold)))
+
+    finally:
+        await engine.dispose()
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
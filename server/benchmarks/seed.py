@@ -0,0 +1,108 @@
+from dataclasses import dataclass, asdict
+from datetime import datetime, timedelta
+from random import Random
+from uuid import uuid4
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from db.base import Base, engine
+from api.user.model import User
+from api.json_token_id.model import JsonTokenId
+from api.tag.model import Tag
+from api.tag.closure import rebuild_closure
+from api.article.model import Article, ArticleRender, association_table
+from api.article.render import render_row
+from api.article.counters import reconcile_counters
+from api.vote.model import Vote
+from api.comment.model import Comment
+from api.user.config import hash_password
+
+BATCH_SIZE = 1000
+PASSWORD = 'benchmark'
+
+WORDS = (
+    'python fastapi async database index query cache latency replica cursor engine session token '
+    'article comment vote tag tree search ranking stream batch pool metric request response schema '
+    'model router migration benchmark throughput percentile baseline profile memory network'
+).split()
+
+
+@dataclass
+class Volumes:
+    users: int = 200
+    tags: int = 30
+    articles: int = 2000
+    votes: int = 10000
+    comments: int = 5000
+    paragraphs: int = 8
+
+
+def sentence(rng: Random, words: int) -> str:
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+
+async def insert_rows(db: AsyncSession, target, rows: list):
+    for start in range(0, len(rows), BATCH_SIZE):
+        await db.execute(insert(target), rows[start:start + BATCH_SIZE])
+
+    await db.commit()
+
+
+async def reset_schema():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+
+async def seed(db: AsyncSession, volumes: Volumes, rng: Random) -> dict:
+    now = datetime.now()
+    password = await hash_password(PASSWORD)
+
+    users = [{
+        "id": str(uuid4()), "first_name": 'Bench', "last_name": f'User-{i}', "email": f'bench-{i}@example.com',
+        "password": password, "role": 'admin' if i == 0 else 'user', "last_login": now,
+    } for i in range(volumes.users)]
+    await insert_rows(db, User, users)
+
+    tags = []
+
+    for i in range(volumes.tags):
+        parent = rng.choice(tags)["id"] if tags and rng.random() < 0.5 else None
+        tags.append({"id": f'bench-tag-{i}', "parent_id": parent, "name": f'Bench Tag {i}'})
+
+    await insert_rows(db, Tag, tags)
+    await rebuild_closure(db)
+
+    articles, links = [], []
+
+    for i in range(volumes.articles):
+        article_id = f'bench-article-{i}'
+        articles.append({
+            "id": article_id,
+            "title": sentence(rng, 6),
+            "article_img_url": f'https://example.com/{i}.png',
+            "description": sentence(rng, 20),
+            "content": ''.join(f'<h2>{sentence(rng, 4)}</h2><p>{sentence(rng, 80)}</p>'
+                               for _ in range(volumes.paragraphs)),
+            "created_at": now - timedelta(minutes=volumes.articles - i),
+        })
+        links.extend({"article_id": article_id, "tag_id": tag["id"]}
+                     for tag in rng.sample(tags, min(len(tags), rng.randint(1, 3))))
+
+    await insert_rows(db, Article, articles)
+    await insert_rows(db, association_table, links)
+    await insert_rows(db, ArticleRender, [
+        render_row(article["id"], article["content"], article["created_at"]) for article in articles])
+
+    votes = {(rng.choice(articles)["id"], rng.choice(users)["id"])
+             for _ in range(min(volumes.votes, len(articles) * len(users)))} if articles and users else set()
+    await insert_rows(db, Vote, [{"article_id": article_id, "user_id": user_id} for article_id, user_id in votes])
+
+    comments = [{
+        "article_id": rng.choice(articles)["id"], "user_id": rng.choice(users)["id"], "comment": sentence(rng, 15),
+        "created_at": now - timedelta(seconds=volumes.comments - i),
+    } for i in range(volumes.comments)] if articles and users else []
+    await insert_rows(db, Comment, comments)
+
+    await reconcile_counters(db)
+
+    return {**asdict(volumes), "votes": len(votes)}
@@ -0,0 +1,66 @@
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+from statistics import median
+from time import perf_counter
+
+PHASES = ('import_seconds', 'lifespan_seconds', 'first_request_seconds', 'first_authenticated_request_seconds')
+
+
+async def measure() -> dict:
+    start = perf_counter()
+    import httpx
+    from main import app
+    from db.base import engine
+    from api.user.oauth2 import create_token, access_private_key
+    from utils.config import settings
+    timings = {"import_seconds": perf_counter() - start}
+
+    async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app, raise_app_exceptions=False), base_url='http://startup') as client:
+        start = perf_counter()
+
+        async with app.router.lifespan_context(app):
+            timings["lifespan_seconds"] = perf_counter() - start
+
+            start = perf_counter()
+            await client.get('/api/v1/tags')
+            timings["first_request_seconds"] = perf_counter() - start
+
+            # includes decrypting the signing key and parsing the public key on first use
+            start = perf_counter()
+            token = create_token(data={"id": 'startup', "role": 'user'}, expiry=settings.ACCESS_EXPIRY,
+                                 private_key=access_private_key())
+            await client.get('/api/v1/current_user', headers={"Authorization": f'Bearer {token}'})
+            timings["first_authenticated_request_seconds"] = perf_counter() - start
+
+    await engine.dispose()
+
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time a cold import of the app and its first requests')
+    parser.add_argument('--runs', type=int, default=5, help='fresh interpreters to start')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        return print(json.dumps(asyncio.run(measure())))
+
+    runs = []
+
+    for _ in range(args.runs):
+        start = perf_counter()
+        output = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.startup', '--child'], capture_output=True, text=True, check=True)
+        runs.append({**json.loads(output.stdout.strip().splitlines()[-1]), "process_seconds": perf_counter() - start})
+
+    print(json.dumps({phase: round(median(run[phase] for run in runs), 4)
+                      for phase in (*PHASES, 'process_seconds')}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+from dataclasses import dataclass
+from random import Random
+from typing import Callable
+
+@dataclass
+class Fixtures:
+    article_ids: list
+    tag_ids: list
+    root_tag_ids: list
+    words: list
+    tokens: list
+
+
+@dataclass
+class Call:
+    name: str
+    method: str
+    url: str
+    auth: bool = False
+    json: dict | None = None
+
+
+Route = Callable[[Fixtures, Random], Call]
+
+
+READS: list[tuple[int, Route]] = [
+    (25, lambda f, r: Call('articles_summary', 'GET', '/api/v1/articles?view=summary')),
+    (10, lambda f, r: Call('articles_full', 'GET', '/api/v1/articles')),
+    (5, lambda f, r: Call('articles_top', 'GET', '/api/v1/articles?view=summary&sort=top')),
+    (5, lambda f, r: Call('articles_search', 'GET', f'/api/v1/articles?view=summary&query={r.choice(f.words)}')),
+    (25, lambda f, r: Call('article_detail', 'GET', f'/api/v1/article/{r.choice(f.article_ids)}')),
+    (5, lambda f, r: Call('comment_thread', 'GET', f'/api/v1/comment/{r.choice(f.article_ids)}')),
+    (10, lambda f, r: Call('tag_articles', 'GET', f'/api/v1/tag/articles/{r.choice(f.tag_ids)}?view=summary')),
+    (3, lambda f, r: Call('tag_subtree_articles', 'GET',
+                          f'/api/v1/tag/articles/{r.choice(f.root_tag_ids)}?view=summary&include_subtags=true')),
+    (5, lambda f, r: Call('tags', 'GET', '/api/v1/tags')),
+    (2, lambda f, r: Call('tag_tree', 'GET', '/api/v1/tag/tree')),
+]
+
+WRITES: list[tuple[int, Route]] = [
+    (6, lambda f, r: Call('vote_toggle', 'GET', f'/api/v1/vote/{r.choice(f.article_ids)}', auth=True)),
+    (3, lambda f, r: Call('vote_check', 'POST', '/api/v1/vote/check', auth=True,
+                          json={"article_ids": r.sample(f.article_ids, min(20, len(f.article_ids)))})),
+    (3, lambda f, r: Call('comment_create', 'POST', f'/api/v1/comment/{r.choice(f.article_ids)}/create', auth=True,
+                          json={"comment": ' '.join(r.choices(f.words, k=12))})),
+    (3, lambda f, r: Call('current_user', 'GET', '/api/v1/current_user', auth=True)),
+]
+
+MIXES = {
+    'read': READS,
+    'mixed': READS + WRITES,
+    'write': WRITES,
+}
+
+
+def plan(mix: str, count: int, fixtures: Fixtures, rng: Random) -> list[Call]:
+    weights, routes = zip(*MIXES[mix])
+
+    return [route(fixtures, rng) for route in rng.choices(routes, weights=weights, k=count)]
@@ -1,11 +1,16 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import declarative_base, sessionmaker
+from random import choice
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.orm import declarative_base, Session
+from sqlalchemy.sql.dml import UpdateBase
 from sqlalchemy.engine.url import URL 
 from utils.config import settings
+from db.instrumentation import instrument_engine, InstrumentedPool
+from db.routing import current_route
 
 Base = declarative_base()
 
-MYSQL_URL = URL.create(
+# DB_URL overrides the individual parts, e.g. sqlite+aiosqlite for the test suite
+MYSQL_URL = settings.DB_URL or URL.create(
     drivername=settings.DB_DRIVERNAME,
     username=settings.DB_USERNAME,
     password=settings.DB_PASSWORD,
@@ -14,5 +19,44 @@ MYSQL_URL = URL.create(
     database=settings.DB_DATABASE
 )
 
-engine = create_engine(MYSQL_URL)
-DB_LOCAL = sessionmaker(autocommit=False, autoflush=False, bind=engine)
\ No newline at end of file
+
+def make_engine(url):
+    engine = create_async_engine(
+        url,
+        poolclass=InstrumentedPool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+    )
+    instrument_engine(engine.sync_engine)
+
+    return engine
+
+
+engine = make_engine(MYSQL_URL)
+replica_engines = [make_engine(url) for url in settings.DB_REPLICA_URLS]
+
+
+class RoutingSession(Session):
+    # reads inside a replica-routed request go to one replica per session, anything that writes goes to the primary
+    replica = None
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        route = current_route()
+
+        if route is not None and (self._flushing or isinstance(clause, UpdateBase)):
+            route.wrote = True
+
+        if route is None or not route.read_only or route.wrote:
+            return engine.sync_engine
+
+        if self.replica is None:
+            self.replica = choice(replica_engines).sync_engine
+
+        return self.replica
+
+
+DB_LOCAL = async_sessionmaker(
+    autocommit=False, autoflush=False, expire_on_commit=False, sync_session_class=RoutingSession)
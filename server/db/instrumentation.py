@@ -0,0 +1,97 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from time import perf_counter
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    elapsed: float = 0.0
+
+
+# a stack so nested counters (a benchmark around the metrics middleware) each see every query
+_query_stats: ContextVar[tuple[QueryStats, ...]] = ContextVar('query_stats', default=())
+
+
+class PoolStats:
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, elapsed: float, timed_out: bool):
+        self.checkouts += 1
+        self.timeouts += timed_out
+        self.total_wait += elapsed
+        self.max_wait = max(self.max_wait, elapsed)
+
+    def stats(self, pool):
+        return {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "avg_wait_seconds": self.total_wait / self.checkouts if self.checkouts else 0.0,
+            "max_wait_seconds": self.max_wait,
+        }
+
+
+pool_stats = PoolStats()
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    # times how long each checkout waits for a free connection, including pool timeouts
+    def _do_get(self):
+        start, timed_out = perf_counter(), False
+
+        try:
+            return super()._do_get()
+
+        except PoolTimeoutError:
+            timed_out = True
+            raise
+
+        finally:
+            pool_stats.record(perf_counter() - start, timed_out)
+
+
+def instrument_engine(engine):
+    @event.listens_for(engine, 'before_cursor_execute')
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_start', []).append(perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = perf_counter() - conn.info['query_start'].pop()
+
+        for stats in _query_stats.get():
+            stats.count += 1
+            stats.elapsed += elapsed
+
+
+@contextmanager
+def count_queries():
+    stats = QueryStats()
+    token = _query_stats.set((*_query_stats.get(), stats))
+
+    try:
+        yield stats
+
+    finally:
+        _query_stats.reset(token)
+
+
+@contextmanager
+def query_budget(max_queries: int):
+    with count_queries() as stats:
+        yield stats
+
+    if stats.count > max_queries:
+        raise AssertionError(f"Expected at most {max_queries} queries, {stats.count} were executed")
@@ -6,4 +6,7 @@ from api.article.model import Article, association_table
 from api.vote.model import Vote
 from api.comment.model import Comment
 
-Base.metadata.create_all(engine)
\ No newline at end of file
+
+async def create_all():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
@@ -0,0 +1,23 @@
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+
+@dataclass
+class Route:
+    read_only: bool
+    wrote: bool = False
+
+
+_route: ContextVar[Route | None] = ContextVar('db_route', default=None)
+
+
+def current_route() -> Route | None:
+    return _route.get()
+
+
+def set_route(route: Route):
+    return _route.set(route)
+
+
+def reset_route(token):
+    _route.reset(token)
@@ -1,15 +1,53 @@
-from fastapi import FastAPI, Depends
-from sqlalchemy.orm import Session
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends, Response
+from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
 from utils.session import get_db
+from utils.pagination import Page, paginate, page_results, CURSOR_HEADER
+from utils.cache import ResponseCacheMiddleware, response_cache
+from utils.replicas import ReplicaRoutingMiddleware
+from utils.compression import CompressionMiddleware
+from utils.metrics import MetricsMiddleware
+from utils.config import settings
+from db.base import replica_engines
 from api.api_v1 import api_router
+import api.internal.metrics
 from typing import List, Optional
 from api.article.model import Article
-from api.article.schemas import ArticleResponse
+from api.article.schemas import ArticleResponse, ArticleSummaryResponse, ArticleView, ArticleSort
+from api.article.loaders import article_loader_options, article_summary_loader_options
+from api.article.search import search_relevance
 from api.tag.model import Tag
 from api.tag.schemas import TagResponse
+from api.tag.cache import tag_index
+from api.json_token_id.cache import revocation_cache
+from api.json_token_id.tasks import prune_forever
+from api.write_behind import write_behind
 from fastapi.middleware.cors import CORSMiddleware
 
-app = FastAPI(docs_url=None)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    tasks = [
+        asyncio.create_task(revocation_cache.sync_forever()),
+        asyncio.create_task(prune_forever()),
+    ]
+
+    await tag_index.warm()
+
+    if settings.WRITE_BEHIND:
+        write_behind.start()
+
+    yield
+
+    for task in tasks:
+        task.cancel()
+
+    await write_behind.drain()
+
+app = FastAPI(docs_url=None, lifespan=lifespan)
 
 origins = [
     "http://localhost:5173",
@@ -17,26 +55,70 @@ origins = [
     "https://www.blog.desmondafari.com",
 ]
 
+if replica_engines:
+    app.add_middleware(ReplicaRoutingMiddleware, sticky_seconds=settings.DB_REPLICA_STICKY_SECONDS)
+
+app.add_middleware(
+    ResponseCacheMiddleware,
+    cache=response_cache,
+    paths=[
+        r'/api/v1/articles',
+        r'/api/v1/tags',
+        r'/api/v1/article/(?!export$)[^/]+',
+        r'/api/v1/tag/[^/]+',
+        r'/api/v1/tag/articles/[^/]+',
+        r'/api/v1/comment/[^/]+',
+    ],
+)
+
+app.add_middleware(CompressionMiddleware, minimum_size=settings.COMPRESSION_MINIMUM_SIZE)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[CURSOR_HEADER],
 )
 
+app.add_middleware(MetricsMiddleware, routes=app.routes)
+
 @app.get('/', status_code=200)
 async def root():
     return {"message": "connection established"}
 
 
-@app.get('/api/v1/articles', status_code=200, response_model=List[ArticleResponse])
-async def get_articles(query: Optional[str] = "", db: Session = Depends(get_db)):
-    return db.query(Article).filter(Article.title.contains(query)).all()
+@app.get('/metrics', include_in_schema=False)
+async def metrics():
+    return Response(generate_latest(), headers={'Content-Type': CONTENT_TYPE_LATEST})
+
+
+@app.get('/api/v1/articles', status_code=200,
+         response_model=List[ArticleResponse] | List[ArticleSummaryResponse])
+async def get_articles(
+    response: Response, query: Optional[str] = "", view: ArticleView = 'full', sort: ArticleSort = 'latest',
+    page: Page = Depends(), db: AsyncSession = Depends(get_db)):
+    options = article_summary_loader_options() if view == 'summary' else article_loader_options()
+    relevance = search_relevance(query)
+
+    if relevance is not None:
+        stmt = select(Article).options(*options).where(relevance).order_by(relevance.desc()).limit(page.limit)
+        return (await db.scalars(stmt)).all()
+
+    columns = [Article.created_at, Article.id]
+
+    if sort == 'top':
+        columns.insert(0, Article.vote_count)
+
+    stmt = select(Article).options(*options)
+    articles = (await db.scalars(paginate(stmt, columns, page))).all()
+
+    return page_results(articles, columns, page, response)
 
 
 @app.get('/api/v1/tags', status_code=200, response_model=List[TagResponse])
-async def get_tags(db: Session = Depends(get_db)):
-    return db.query(Tag).all()
+async def get_tags(db: AsyncSession = Depends(get_db)):
+    return (await db.scalars(select(Tag))).all()
 
 app.include_router(api_router, prefix='/api/v1')
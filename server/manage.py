@@ -0,0 +1,101 @@
+import argparse
+import asyncio
+import sys
+from db.base import DB_LOCAL, engine
+from db.models import create_all
+from api.article.counters import reconcile_counters
+from api.tag.closure import rebuild_closure
+from api.article.render import render_stale_articles
+from api.article.bulk import import_articles, export_articles
+from utils.config import settings
+
+
+async def migrate_command(args):
+    await create_all()
+
+    print('Created any missing tables')
+
+
+async def reconcile_counters_command(args):
+    async with DB_LOCAL() as db:
+        checked = await reconcile_counters(db, args.batch_size)
+
+    print(f'Reconciled vote and comment counters for {checked} articles')
+
+
+async def rebuild_tag_closure_command(args):
+    async with DB_LOCAL() as db:
+        rebuilt = await rebuild_closure(db)
+
+    print(f'Rebuilt tag closure for {rebuilt} tags')
+
+
+async def render_articles_command(args):
+    async with DB_LOCAL() as db:
+        rendered = await render_stale_articles(db, args.batch_size)
+
+    print(f'Rendered {rendered} missing or stale articles')
+
+
+async def import_articles_command(args):
+    async def lines():
+        for line in args.file:
+            yield line
+
+    async with DB_LOCAL() as db:
+        report = await import_articles(db, lines(), args.batch_size)
+
+    for error in report.errors:
+        print(f'line {error.line}: {error.detail}', file=sys.stderr)
+
+    print(f'Imported {report.imported} articles, {report.failed} failed')
+
+
+async def export_articles_command(args):
+    async with DB_LOCAL() as db:
+        async for line in export_articles(db, args.batch_size):
+            args.file.write(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Blog server management commands')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    migrate = commands.add_parser('migrate', help='Create any missing tables')
+    migrate.set_defaults(handler=migrate_command)
+
+    reconcile = commands.add_parser('reconcile-counters', help='Recount article votes and comments')
+    reconcile.add_argument('--batch-size', type=int, default=1000)
+    reconcile.set_defaults(handler=reconcile_counters_command)
+
+    closure = commands.add_parser('rebuild-tag-closure', help='Rebuild the tag ancestry table from parent ids')
+    closure.set_defaults(handler=rebuild_tag_closure_command)
+
+    render = commands.add_parser('render-articles', help='Precompute html, excerpts and contents for stale articles')
+    render.add_argument('--batch-size', type=int, default=settings.BULK_BATCH_SIZE)
+    render.set_defaults(handler=render_articles_command)
+
+    importer = commands.add_parser('import-articles', help='Bulk import articles from NDJSON')
+    importer.add_argument('file', type=argparse.FileType('rb'), help="NDJSON file, or '-' for stdin")
+    importer.add_argument('--batch-size', type=int, default=settings.BULK_BATCH_SIZE)
+    importer.set_defaults(handler=import_articles_command)
+
+    exporter = commands.add_parser('export-articles', help='Stream all articles to NDJSON')
+    exporter.add_argument('file', type=argparse.FileType('wb'), help="output file, or '-' for stdout")
+    exporter.add_argument('--batch-size', type=int, default=settings.BULK_BATCH_SIZE)
+    exporter.set_defaults(handler=export_articles_command)
+
+    args = parser.parse_args()
+
+    async def run():
+        try:
+            await args.handler(args)
+
+        finally:
+            await engine.dispose()
+
+    asyncio.run(run())
+
+
+if __name__ == '__main__':
+    main()
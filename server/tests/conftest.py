@@ -0,0 +1,48 @@
+import os
+from tempfile import mkdtemp
+
+# settings are read at import time, so point them at a throwaway sqlite database before anything imports them
+os.environ.update({
+    "DB_URL": f"sqlite+aiosqlite:///{os.path.join(mkdtemp(), 'test.db')}",
+    "DB_DRIVERNAME": "sqlite+aiosqlite",
+    "DB_USERNAME": "",
+    "DB_PASSWORD": "",
+    "DB_HOST": "",
+    "DB_PORT": "0",
+    "DB_DATABASE": "",
+    "ACCESS_KEY": "",
+    "REFRESH_KEY": "",
+    "ACCESS_EXPIRY": "15",
+    "REFRESH_EXPIRY": "60",
+    "RESPONSE_CACHE_SIZE": "0",
+})
+
+import httpx
+import pytest
+from db.base import Base, DB_LOCAL, engine
+from db.models import create_all
+from main import app
+
+
+@pytest.fixture
+def anyio_backend():
+    return 'asyncio'
+
+
+@pytest.fixture
+async def db():
+    await create_all()
+
+    async with DB_LOCAL() as session:
+        yield session
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+
+
+@pytest.fixture
+async def client(db):
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url='http://test/api/v1') as client:
+        yield client
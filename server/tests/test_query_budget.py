@@ -0,0 +1,66 @@
+import pytest
+from datetime import datetime, timedelta
+from api.user.model import User
+from api.tag.model import Tag
+from api.article.model import Article
+from api.vote.model import Vote
+from api.comment.model import Comment
+from db.instrumentation import query_budget
+
+pytestmark = pytest.mark.anyio
+
+ARTICLES = 5
+
+
+# enough rows that an N+1 on any relationship would blow the budgets below
+@pytest.fixture
+async def articles(db):
+    now = datetime.now()
+    users = [User(id=f'user-{i}', first_name='First', last_name='Last', email=f'{i}@example.com', password='x')
+             for i in range(3)]
+    tags = [Tag(id=f'tag-{i}', name=f'Tag {i}') for i in range(2)]
+    db.add_all(users + tags)
+
+    for i in range(ARTICLES):
+        article = Article(
+            id=f'article-{i}', title=f'Article {i}', article_img_url='https://example.com/a.png', description='d',
+            content='<p>body</p>', created_at=now - timedelta(minutes=i), tags=tags,
+            vote_count=len(users), comment_count=len(users))
+        article.votes = [Vote(user_id=user.id) for user in users]
+        article.comments = [
+            Comment(user_id=user.id, comment='hi', created_at=now - timedelta(seconds=j))
+            for j, user in enumerate(users)]
+        db.add(article)
+
+    await db.commit()
+
+    return [f'article-{i}' for i in range(ARTICLES)]
+
+
+@pytest.mark.parametrize('path, budget', [
+    ('/articles', 5),
+    ('/articles?view=summary', 3),
+    ('/tag/articles/tag-0', 5),
+])
+async def test_listing_query_budget(client, articles, path, budget):
+    with query_budget(budget):
+        response = await client.get(path)
+
+    assert response.status_code == 200
+    assert len(response.json()) == ARTICLES
+
+
+async def test_article_detail_query_budget(client, articles):
+    with query_budget(5):
+        response = await client.get(f'/article/{articles[0]}')
+
+    assert response.status_code == 200
+    assert len(response.json()['comments']) == 3
+
+
+async def test_comment_thread_query_budget(client, articles):
+    with query_budget(2):
+        response = await client.get(f'/comment/{articles[0]}')
+
+    assert response.status_code == 200
+    assert len(response.json()) == 3
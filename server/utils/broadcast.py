@@ -0,0 +1,18 @@
+from collections import defaultdict
+from typing import Callable
+
+
+# in-process stand-in; swap `broadcaster` for a pub/sub backed one (e.g. Redis) to reach every worker
+class LocalBroadcaster:
+    def __init__(self):
+        self._subscribers: dict[str, list[Callable]] = defaultdict(list)
+
+    def subscribe(self, channel: str, callback: Callable):
+        self._subscribers[channel].append(callback)
+
+    async def publish(self, channel: str, message):
+        for callback in self._subscribers[channel]:
+            callback(message)
+
+
+broadcaster = LocalBroadcaster()
@@ -0,0 +1,153 @@
+import re
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from hashlib import blake2b
+from time import monotonic
+from utils.broadcast import broadcaster
+from utils.compression import negotiate, compressible, compress, encoded_headers, VARY
+from utils.config import settings
+
+INVALIDATE_CHANNEL = 'response_cache'
+
+ARTICLE_LISTINGS = ('/api/v1/articles', '/api/v1/tag/articles/')
+ARTICLE_DETAILS = '/api/v1/article/'
+COMMENT_THREADS = '/api/v1/comment/'
+TAG_LISTINGS = ('/api/v1/tags', '/api/v1/tag/')
+
+
+@dataclass
+class CachedResponse:
+    status: int
+    headers: list
+    body: bytes
+    etag: str
+    compressible: bool = False
+    variants: dict[str, bytes] = field(default_factory=dict)
+    created: float = field(default_factory=monotonic)
+
+    # compressed once per encoding on first request, at a higher quality than per-response compression can afford
+    def variant(self, encoding: str) -> bytes:
+        if encoding not in self.variants:
+            self.variants[encoding] = compress(
+                self.body, encoding, settings.COMPRESSION_CACHED_BROTLI_QUALITY if encoding == 'br' else None)
+
+        return self.variants[encoding]
+
+
+class ResponseCache:
+    def __init__(self, max_entries: int, ttl: int):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries: OrderedDict[str, CachedResponse] = OrderedDict()
+        self.generation = 0
+
+    def get(self, key: str):
+        entry = self.entries.get(key)
+
+        if entry is None:
+            return None
+
+        if monotonic() - entry.created > self.ttl:
+            del self.entries[key]
+            return None
+
+        self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key: str, entry: CachedResponse, generation: int):
+        if generation != self.generation:
+            return
+
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    # an entry ending in '/' drops every cached path under it, anything else only that exact path
+    def invalidate(self, paths):
+        self.generation += 1
+
+        for key in list(self.entries):
+            path = key.split('?', 1)[0]
+
+            if any(path == p or (p.endswith('/') and path.startswith(p)) for p in paths):
+                del self.entries[key]
+
+
+response_cache = ResponseCache(settings.RESPONSE_CACHE_SIZE, settings.RESPONSE_CACHE_TTL)
+broadcaster.subscribe(INVALIDATE_CHANNEL, response_cache.invalidate)
+
+
+async def invalidate_responses(*paths: str):
+    await broadcaster.publish(INVALIDATE_CHANNEL, paths)
+
+
+class ResponseCacheMiddleware:
+    def __init__(self, app, cache: ResponseCache, paths: list[str]):
+        self.app = app
+        self.cache = cache
+        self.paths = [re.compile(path) for path in paths]
+        self.cache_control = f'public, max-age={settings.RESPONSE_CACHE_MAX_AGE}, must-revalidate'.encode()
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['method'] != 'GET' \
+                or not any(path.fullmatch(scope['path']) for path in self.paths):
+            return await self.app(scope, receive, send)
+
+        key = scope['path'] + '?' + scope['query_string'].decode('latin-1')
+        headers = dict(scope['headers'])
+        if_none_match = headers.get(b'if-none-match')
+        encoding = negotiate(headers.get(b'accept-encoding'))
+        entry = self.cache.get(key)
+
+        if entry is not None:
+            return await self.send_entry(entry, if_none_match, encoding, send)
+
+        generation = self.cache.generation
+        start, chunks = {}, []
+
+        async def capture(message):
+            if message['type'] == 'http.response.start':
+                start.update(message)
+
+            elif message['type'] == 'http.response.body':
+                chunks.append(message.get('body', b''))
+
+        await self.app(scope, receive, capture)
+
+        body = b''.join(chunks)
+        headers = [(k, v) for k, v in start.get('headers', []) if k.lower() not in (b'etag', b'cache-control')]
+
+        if start.get('status') != 200:
+            await send({**start, 'headers': headers})
+            return await send({'type': 'http.response.body', 'body': body})
+
+        entry = CachedResponse(
+            status=200, headers=headers, body=body, etag=f'"{blake2b(body, digest_size=16).hexdigest()}"',
+            compressible=len(body) >= settings.COMPRESSION_MINIMUM_SIZE and compressible(headers))
+        self.cache.put(key, entry, generation)
+
+        await self.send_entry(entry, if_none_match, encoding, send)
+
+    async def send_entry(self, entry: CachedResponse, if_none_match: bytes | None, encoding: str | None, send):
+        # each encoding is a distinct representation, so it gets its own etag
+        encoding = encoding if entry.compressible else None
+        etag = (entry.etag if encoding is None else f'{entry.etag[:-1]}-{encoding}"').encode()
+        validators = [(b'etag', etag), (b'cache-control', self.cache_control)]
+        vary = [VARY] if entry.compressible else []
+
+        if if_none_match is not None and etag in [tag.strip() for tag in if_none_match.split(b',')]:
+            await send({'type': 'http.response.start', 'status': 304, 'headers': validators + vary})
+            return await send({'type': 'http.response.body', 'body': b''})
+
+        if encoding is None:
+            await send({
+                'type': 'http.response.start', 'status': entry.status, 'headers': entry.headers + validators + vary})
+            return await send({'type': 'http.response.body', 'body': entry.body})
+
+        body = entry.variant(encoding)
+        headers = encoded_headers(entry.headers, encoding, len(body)) + validators
+
+        await send({'type': 'http.response.start', 'status': entry.status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': body})
@@ -0,0 +1,123 @@
+import gzip
+import zlib
+import brotli
+from utils.config import settings
+
+# server preference when the client weights several encodings equally
+ENCODINGS = ('br', 'gzip')
+COMPRESSIBLE_TYPES = (b'application/json', b'application/x-ndjson', b'text/')
+VARY = (b'vary', b'Accept-Encoding')
+
+
+def negotiate(accept_encoding: bytes | None) -> str | None:
+    if not accept_encoding:
+        return None
+
+    weights = {}
+
+    for part in accept_encoding.decode('latin-1').lower().split(','):
+        coding, _, params = part.strip().partition(';')
+
+        try:
+            weights[coding.strip()] = float(params.strip()[2:]) if params.strip().startswith('q=') else 1.0
+
+        except ValueError:
+            continue
+
+    best = max(ENCODINGS, key=lambda encoding: weights.get(encoding, weights.get('*', 0.0)))
+
+    return best if weights.get(best, weights.get('*', 0.0)) > 0 else None
+
+
+def compressible(headers: list) -> bool:
+    content_type = content_encoding = b''
+
+    for key, value in headers:
+        key = key.lower()
+
+        if key == b'content-type':
+            content_type = value.lower()
+
+        elif key == b'content-encoding':
+            content_encoding = value
+
+    return not content_encoding and content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def compress(body: bytes, encoding: str, quality: int | None = None) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(body, quality=quality or settings.COMPRESSION_BROTLI_QUALITY)
+
+    return gzip.compress(body, compresslevel=quality or settings.COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+def compressor(encoding: str):
+    if encoding == 'br':
+        return brotli.Compressor(quality=settings.COMPRESSION_BROTLI_QUALITY)
+
+    return zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+
+def encoded_headers(headers: list, encoding: str, length: int | None) -> list:
+    headers = [(k, v) for k, v in headers if k.lower() not in (b'content-length', b'vary')]
+    headers += [(b'content-encoding', encoding.encode()), VARY]
+
+    return headers + [(b'content-length', str(length).encode())] if length is not None else headers
+
+
+class CompressionMiddleware:
+    # whole bodies under minimum_size go out as they are; streamed bodies are compressed chunk by chunk
+    def __init__(self, app, minimum_size: int):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        encoding = negotiate(dict(scope['headers']).get(b'accept-encoding'))
+
+        if encoding is None:
+            return await self.app(scope, receive, send)
+
+        start, stream = None, None
+
+        async def send_compressed(message):
+            nonlocal start, stream
+
+            if message['type'] == 'http.response.start':
+                if compressible(message.get('headers', [])):
+                    start = message
+                    return
+
+                return await send(message)
+
+            if message['type'] != 'http.response.body' or start is None:
+                return await send(message)
+
+            body, more_body = message.get('body', b''), message.get('more_body', False)
+
+            if stream is None and not more_body:
+                headers = start.get('headers', [])
+
+                if len(body) < self.minimum_size:
+                    await send({**start, 'headers': [*headers, VARY]})
+                    return await send(message)
+
+                body = compress(body, encoding)
+                await send({**start, 'headers': encoded_headers(headers, encoding, len(body))})
+                return await send({'type': 'http.response.body', 'body': body})
+
+            if stream is None:
+                stream = compressor(encoding)
+                await send({**start, 'headers': encoded_headers(start.get('headers', []), encoding, None)})
+
+            if encoding == 'br':
+                chunk = stream.process(body) + (stream.flush() if more_body else stream.finish())
+
+            else:
+                chunk = stream.compress(body) + stream.flush(zlib.Z_SYNC_FLUSH if more_body else zlib.Z_FINISH)
+
+            await send({'type': 'http.response.body', 'body': chunk, 'more_body': more_body})
+
+        await self.app(scope, receive, send_compressed)
@@ -1,4 +1,5 @@
 from pydantic_settings import BaseSettings
+from typing import List, Optional
 
 class Settings(BaseSettings):
     DB_DRIVERNAME: str
@@ -7,6 +8,16 @@ class Settings(BaseSettings):
     DB_HOST: str
     DB_PORT: int
     DB_DATABASE: str
+    DB_URL: Optional[str] = None
+
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: int = 10
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+
+    DB_REPLICA_URLS: List[str] = []
+    DB_REPLICA_STICKY_SECONDS: int = 5
 
     ACCESS_KEY: str
     REFRESH_KEY: str
@@ -14,6 +25,36 @@ class Settings(BaseSettings):
     ACCESS_EXPIRY: int
     REFRESH_EXPIRY: int
 
+    JWT_ALGORITHM: str = 'RS256'
+    TOKEN_CACHE_SIZE: int = 10000
+
+    REVOCATION_CACHE_SIZE: int = 10000
+    REVOCATION_BLOOM_SIZE: int = 1 << 23
+    REVOCATION_BLOOM_HASHES: int = 7
+    REVOCATION_SYNC_INTERVAL: int = 10
+
+    JTI_PRUNE_INTERVAL: int = 3600
+    JTI_PRUNE_BATCH_SIZE: int = 1000
+
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 64
+
+    RESPONSE_CACHE_SIZE: int = 1024
+    RESPONSE_CACHE_TTL: int = 300
+    RESPONSE_CACHE_MAX_AGE: int = 0
+
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    COMPRESSION_BROTLI_QUALITY: int = 4
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_CACHED_BROTLI_QUALITY: int = 6
+
+    BULK_BATCH_SIZE: int = 1000
+
+    WRITE_BEHIND: bool = False
+    WRITE_BEHIND_MAX_PENDING: int = 10000
+    WRITE_BEHIND_BATCH_SIZE: int = 500
+    WRITE_BEHIND_FLUSH_INTERVAL: float = 1.0
+
     class Config:
         env_file = '.env'
 
@@ -0,0 +1,67 @@
+from time import perf_counter
+from prometheus_client import Counter, Gauge, Histogram
+from starlette.routing import Match
+from db.instrumentation import count_queries
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds', 'Request latency by route', ['method', 'route', 'status'])
+REQUESTS_IN_FLIGHT = Gauge('http_requests_in_flight', 'Requests currently being handled', ['method', 'route'])
+REQUEST_QUERIES = Histogram(
+    'http_request_db_queries', 'SQL statements executed per request', ['method', 'route'],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89))
+REQUEST_DB_TIME = Histogram('http_request_db_seconds', 'Time spent in SQL per request', ['method', 'route'])
+REQUEST_EXCEPTIONS = Counter('http_request_exceptions', 'Unhandled exceptions by route', ['method', 'route'])
+TOKEN_VERIFY_SECONDS = Histogram(
+    'auth_token_verify_seconds', 'Time spent verifying JWTs, including cache hits',
+    buckets=(0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05))
+
+UNMATCHED_ROUTE = '<unmatched>'
+
+
+class MetricsMiddleware:
+    def __init__(self, app, routes: list):
+        self.app = app
+        self.routes = routes
+
+    def route_for(self, scope) -> str:
+        # label by path template so ids don't explode label cardinality
+        for route in self.routes:
+            match, _ = route.matches(scope)
+
+            if match == Match.FULL:
+                return route.path
+
+        return UNMATCHED_ROUTE
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        method, route = scope['method'], self.route_for(scope)
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+
+            if message['type'] == 'http.response.start':
+                status = message['status']
+
+            await send(message)
+
+        in_flight = REQUESTS_IN_FLIGHT.labels(method, route)
+        in_flight.inc()
+        start = perf_counter()
+
+        try:
+            with count_queries() as queries:
+                await self.app(scope, receive, send_with_status)
+
+        except Exception:
+            REQUEST_EXCEPTIONS.labels(method, route).inc()
+            raise
+
+        finally:
+            in_flight.dec()
+            REQUEST_LATENCY.labels(method, route, str(status)).observe(perf_counter() - start)
+            REQUEST_QUERIES.labels(method, route).observe(queries.count)
+            REQUEST_DB_TIME.labels(method, route).observe(queries.elapsed)
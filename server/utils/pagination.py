@@ -0,0 +1,57 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+from typing import List, Optional
+from fastapi import HTTPException, Query, Response
+from sqlalchemy import and_, or_
+import json
+
+PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+CURSOR_HEADER = 'X-Next-Cursor'
+
+
+class Page:
+    def __init__(self, cursor: Optional[str] = None, limit: int = Query(PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)):
+        self.cursor = cursor
+        self.limit = limit
+
+
+def encode_cursor(values: list) -> str:
+    values = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+
+    return urlsafe_b64encode(json.dumps(values).encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor: str, columns: list) -> list:
+    try:
+        values = json.loads(urlsafe_b64decode(cursor.encode('ascii')))
+
+        if len(values) != len(columns):
+            raise ValueError
+
+        return [
+            datetime.fromisoformat(value) if column.type.python_type is datetime else value
+            for column, value in zip(columns, values)
+        ]
+
+    except (ValueError, TypeError):
+        raise HTTPException(400, detail='Invalid cursor')
+
+
+def paginate(stmt, columns: list, page: Page):
+    if page.cursor:
+        values = decode_cursor(page.cursor, columns)
+        stmt = stmt.where(or_(*[
+            and_(*[columns[j] == values[j] for j in range(i)], columns[i] < values[i])
+            for i in range(len(columns))
+        ]))
+
+    return stmt.order_by(*[column.desc() for column in columns]).limit(page.limit + 1)
+
+
+def page_results(rows: List, columns: list, page: Page, response: Response) -> List:
+    if len(rows) > page.limit:
+        rows = rows[:page.limit]
+        response.headers[CURSOR_HEADER] = encode_cursor([getattr(rows[-1], column.key) for column in columns])
+
+    return rows
@@ -0,0 +1,34 @@
+from starlette.requests import cookie_parser
+from db.routing import Route, set_route, reset_route
+
+STICKY_COOKIE = '_primary'
+READ_METHODS = ('GET', 'HEAD')
+
+
+class ReplicaRoutingMiddleware:
+    # anonymous reads go to replicas; authenticated requests, mutations and clients that just wrote stay on the primary
+    def __init__(self, app, sticky_seconds: int):
+        self.app = app
+        self.sticky_cookie = (
+            f'{STICKY_COOKIE}=1; Max-Age={sticky_seconds}; Path=/; HttpOnly; Secure; SameSite=Lax').encode()
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        headers = dict(scope['headers'])
+        sticky = STICKY_COOKIE in cookie_parser(headers.get(b'cookie', b'').decode('latin-1'))
+        route = Route(read_only=scope['method'] in READ_METHODS and b'authorization' not in headers and not sticky)
+        token = set_route(route)
+
+        async def send_with_sticky(message):
+            if message['type'] == 'http.response.start' and route.wrote:
+                message = {**message, 'headers': [*message.get('headers', []), (b'set-cookie', self.sticky_cookie)]}
+
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_sticky)
+
+        finally:
+            reset_route(token)
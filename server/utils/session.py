@@ -1,10 +1,5 @@
 from db.base import DB_LOCAL
 
-def get_db():
-    db = DB_LOCAL()
-
-    try:
+async def get_db():
+    async with DB_LOCAL() as db:
         yield db
-
-    finally:
-        db.close()
\ No newline at end of file
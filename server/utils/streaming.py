@@ -0,0 +1,42 @@
+from typing import Literal, Type
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from db.base import DB_LOCAL
+
+StreamFormat = Literal['json', 'ndjson']
+STREAM_BATCH_SIZE = 500
+
+MEDIA_TYPES = {
+    'json': 'application/json',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def stream_rows(stmt, schema: Type[BaseModel], format: StreamFormat, batch_size: int = STREAM_BATCH_SIZE):
+    # runs in its own session because yield dependencies are torn down before the body is sent
+    async def body():
+        separator = b',' if format == 'json' else b'\n'
+        first = True
+
+        if format == 'json':
+            yield b'['
+
+        async with DB_LOCAL() as db:
+            result = await db.stream_scalars(stmt.execution_options(yield_per=batch_size))
+
+            async for rows in result.partitions():
+                chunk = separator.join(schema.model_validate(row).model_dump_json().encode() for row in rows)
+
+                if format == 'json' and not first:
+                    chunk = separator + chunk
+
+                elif format == 'ndjson':
+                    chunk += separator
+
+                first = False
+                yield chunk
+
+        if format == 'json':
+            yield b']'
+
+    return StreamingResponse(body(), media_type=MEDIA_TYPES[format])